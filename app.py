@@ -1,16 +1,31 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+import json
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 from src.agent import DroneOpsAgent
-
-app = FastAPI(title="Drone Ops Coordinator Agent")
-app.mount("/static", StaticFiles(directory="static"), name="static")
+from src.storage import ConflictError, dump_csv
 
 agent = DroneOpsAgent()
 
 
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    yield
+    agent.store.flush_sheet_sync(timeout=10)
+    agent.ollama.classify_cache.flush()
+    if agent.async_ollama is not None:
+        await agent.async_ollama.aclose()
+
+
+app = FastAPI(title="Drone Ops Coordinator Agent", lifespan=lifespan)
+app.mount("/static", StaticFiles(directory="static"), name="static")
+
+
 class ChatRequest(BaseModel):
     message: str
     session_id: str | None = None
@@ -27,12 +42,57 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics() -> dict:
+    llm = {"sync": agent.ollama.stats()}
+    if agent.async_ollama is not None:
+        llm["async"] = agent.async_ollama.stats()
+    return {
+        "llm": llm,
+        "routes": agent.route_stats(),
+        "sheet_sync": agent.store.sheet_sync_stats(),
+        "sheet_poll": agent.store.sheet_poll_stats(),
+    }
+
+
 @app.post("/chat")
-def chat(req: ChatRequest) -> dict:
-    reply, data = agent.handle(req.message)
+async def chat(req: ChatRequest) -> dict:
+    reply, data, route = await agent.handle_with_route_async(req.message)
+    return {"reply": reply, "data": data, "route": route}
+
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest) -> StreamingResponse:
+    async def events():
+        async for event in agent.handle_stream_async(req.message):
+            name = event.pop("event")
+            yield f"event: {name}\ndata: {json.dumps(jsonable_encoder(event))}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/assignments/batch")
+def assign_batch() -> dict:
+    try:
+        reply, data = agent.assign_all()
+    except ConflictError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
     return {"reply": reply, "data": data}
 
 
+@app.get("/export/{table}")
+def export_table(table: str) -> StreamingResponse:
+    # One pass over the table via DataStore.scan, streamed as CSV; an uncached
+    # CSV table is read row by row rather than loaded whole.
+    if table not in ("pilots", "drones", "missions"):
+        raise HTTPException(status_code=404, detail=f"Unknown table: {table}")
+    return StreamingResponse(
+        dump_csv(agent.store.scan(table)),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{table}.csv"'},
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,26 +1,249 @@
+import asyncio
 import os
 import re
-from typing import Any
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Generator, Iterator
 
 from .logic import (
-    detect_conflicts,
+    ConflictEngine,
+    EligibilityMatrix,
+    FleetIndex,
     filter_drones,
     filter_pilots,
     normalize_text,
     recommend_assignment,
+    recommend_batch_assignment,
     urgent_reassignment_plan,
 )
-from .storage import DataStore
-from .llm import OllamaClient
+from .entities import ContextIndex, Entities, EntityVocabulary
+from .storage import ConflictError, DataStore
+from .llm import AsyncOllamaClient, ClassificationCache, OllamaClient, httpx
+
+
+@dataclass
+class _LLMCall:
+    kind: str
+    message: str
+    context: dict[str, Any] | None = None
+
+
+def _advance(flow: Generator, value: Any) -> tuple[bool, Any]:
+    # StopIteration cannot cross a thread-pool future, so unwrap it here.
+    try:
+        return False, flow.send(value)
+    except StopIteration as done:
+        return True, done.value
+
+
+_CONTEXT_STOPWORDS = {
+    "a", "all", "an", "and", "any", "are", "at", "can", "do", "does", "for", "from", "how", "i",
+    "in", "is", "it", "me", "of", "on", "or", "show", "the", "there", "to", "what", "which", "who", "with",
+}
+
+
+# Only an explicit fleet-wide phrase triggers batch assignment; a message
+# naming a project always takes the single-project path.
+_ASSIGN_ALL = re.compile(r"\bassign\s+(all\s+(open\s+)?(missions|projects)|everything)\b")
+
+
+def _finish_stream(result: tuple[str, dict[str, Any], str], streamed: bool) -> Iterator[dict[str, Any]]:
+    reply, data, route = result
+    if not streamed:
+        yield {"event": "token", "text": reply}
+    yield {"event": "done", "reply": reply, "data": data, "route": route}
 
 
 class DroneOpsAgent:
     def __init__(self) -> None:
         self.store = DataStore()
         self.use_llm = os.getenv("USE_LLM", "true").lower() == "true"
-        self.ollama = OllamaClient()
+        classify_cache = ClassificationCache.from_env()
+        self.ollama = OllamaClient(classify_cache)
+        self.async_ollama = AsyncOllamaClient(classify_cache) if httpx is not None else None
+        # (generation, index, entities), replaced as one object so a reader
+        # never pairs the index of one snapshot with another's vocabulary.
+        self._snapshot: tuple[int, FleetIndex | None, EntityVocabulary] = (-1, None, EntityVocabulary([], []))
+        # Built on the first LLM fallback answer of each snapshot.
+        self._context_index: tuple[int, ContextIndex | None] = (-1, None)
+        self.conflict_engine = ConflictEngine()
+        self._routes: Counter[str] = Counter()
+        self._routes_lock = threading.Lock()
+        self.store.subscribe(lambda e: self.conflict_engine.apply(e.table, e.key, e.new))
+
+    def assign_all(self) -> tuple[str, dict[str, Any]]:
+        pilots = self.store.get_pilots()
+        drones = self.store.get_drones()
+        missions = self.store.get_missions()
+        return self._assign_all(pilots, drones, missions, self._fleet_index(pilots, drones, missions))
+
+    def eligibility(self) -> EligibilityMatrix | None:
+        pilots = self.store.get_pilots()
+        drones = self.store.get_drones()
+        missions = self.store.get_missions()
+        return self._fleet_index(pilots, drones, missions).eligibility()
+
+    def conflicts(self) -> list[str]:
+        return self._conflicts(self.store.get_pilots(), self.store.get_drones(), self.store.get_missions())
+
+    def _conflicts(
+        self,
+        pilots: list[dict[str, Any]],
+        drones: list[dict[str, Any]],
+        missions: list[dict[str, Any]],
+    ) -> list[str]:
+        if self.conflict_engine.stale:
+            self.conflict_engine.rebuild(pilots, drones, missions)
+        return self.conflict_engine.conflicts()
+
+    def _find_pilots(
+        self,
+        pilots: list[dict[str, Any]],
+        skill: str | None,
+        cert: str | None,
+        location: str | None,
+        available_only: bool = True,
+        index: FleetIndex | None = None,
+    ) -> list[dict[str, Any]]:
+        # The SQLite and Arrow backends push the status/location filters down.
+        if self.store.backend in ("sqlite", "arrow"):
+            return self.store.find_pilots(skill, cert, location, available_only)
+        return filter_pilots(pilots, skill, cert, location, available_only=available_only, index=index)
+
+    def _find_drones(
+        self,
+        drones: list[dict[str, Any]],
+        capability: str | None,
+        location: str | None,
+        available_only: bool = True,
+        index: FleetIndex | None = None,
+    ) -> list[dict[str, Any]]:
+        if self.store.backend in ("sqlite", "arrow"):
+            return self.store.find_drones(capability, location, available_only)
+        return filter_drones(drones, capability, location, available_only=available_only, index=index)
+
+    def _fleet_index(
+        self,
+        pilots: list[dict[str, Any]],
+        drones: list[dict[str, Any]],
+        missions: list[dict[str, Any]],
+    ) -> FleetIndex:
+        # Rebuilt only when the store hands out a new snapshot.
+        generation, index, _ = self._snapshot
+        if index is None or generation != self.store.generation:
+            generation = self.store.generation
+            index = FleetIndex(pilots, drones, missions)
+            self._snapshot = (generation, index, EntityVocabulary(pilots, drones, missions))
+        return index
 
     def handle(self, message: str) -> tuple[str, dict[str, Any]]:
+        reply, data, _ = self.handle_with_route(message)
+        return reply, data
+
+    async def handle_async(self, message: str) -> tuple[str, dict[str, Any]]:
+        reply, data, _ = await self.handle_with_route_async(message)
+        return reply, data
+
+    def route_stats(self) -> dict[str, int]:
+        with self._routes_lock:
+            return dict(self._routes)
+
+    def _count_route(self, result: tuple[str, dict[str, Any], str]) -> tuple[str, dict[str, Any], str]:
+        with self._routes_lock:
+            self._routes[result[2]] += 1
+        return result
+
+    def handle_with_route(self, message: str) -> tuple[str, dict[str, Any], str]:
+        flow = self._respond(message)
+        result = None
+        while True:
+            done, value = _advance(flow, result)
+            if done:
+                return self._count_route(value)
+            if value.kind == "classify":
+                result = self.ollama.classify(value.message)
+            else:
+                result = self.ollama.answer(value.message, value.context)
+
+    async def handle_with_route_async(self, message: str) -> tuple[str, dict[str, Any], str]:
+        # Same flow as handle_with_route(): storage work runs in a worker thread,
+        # while LLM calls are awaited on the shared async connection pool.
+        if self.async_ollama is None:
+            return await asyncio.to_thread(self.handle_with_route, message)
+        flow = self._respond(message)
+        result = None
+        while True:
+            done, value = await asyncio.to_thread(_advance, flow, result)
+            if done:
+                return self._count_route(value)
+            if value.kind == "classify":
+                result = await self.async_ollama.classify(value.message)
+            else:
+                result = await self.async_ollama.answer(value.message, value.context)
+
+    def handle_stream(self, message: str) -> Iterator[dict[str, Any]]:
+        # Like handle_with_route(), but LLM answers arrive token by token. Every
+        # reply is a run of "token" events closed by one "done" event.
+        flow = self._respond(message)
+        result = None
+        streamed = False
+        while True:
+            done, value = _advance(flow, result)
+            if done:
+                yield from _finish_stream(self._count_route(value), streamed)
+                return
+            if value.kind == "classify":
+                result = self.ollama.classify(value.message)
+                continue
+            tokens = []
+            for token in self.ollama.answer_stream(value.message, value.context):
+                tokens.append(token)
+                yield {"event": "token", "text": token}
+            result = "".join(tokens).strip() or None
+            streamed = result is not None
+
+    async def handle_stream_async(self, message: str) -> AsyncIterator[dict[str, Any]]:
+        if self.async_ollama is None:
+            result = await asyncio.to_thread(self.handle_with_route, message)
+            for event in _finish_stream(result, False):
+                yield event
+            return
+        flow = self._respond(message)
+        result = None
+        streamed = False
+        while True:
+            done, value = await asyncio.to_thread(_advance, flow, result)
+            if done:
+                for event in _finish_stream(self._count_route(value), streamed):
+                    yield event
+                return
+            if value.kind == "classify":
+                result = await self.async_ollama.classify(value.message)
+                continue
+            tokens = []
+            async for token in self.async_ollama.answer_stream(value.message, value.context):
+                tokens.append(token)
+                yield {"event": "token", "text": token}
+            result = "".join(tokens).strip() or None
+            streamed = result is not None
+
+    def _respond(self, message: str) -> Generator[_LLMCall, Any, tuple[str, dict[str, Any], str]]:
+        # A write that lost a compare-and-swap race is retried once on fresh data.
+        try:
+            return (yield from self._respond_once(message))
+        except ConflictError:
+            pass
+        try:
+            return (yield from self._respond_once(message))
+        except ConflictError as exc:
+            return f"{exc} Please try again.", {"conflict": {"table": exc.table, "key": exc.key}}, "rules"
+
+    def _respond_once(self, message: str) -> Generator[_LLMCall, Any, tuple[str, dict[str, Any], str]]:
+        # Yields each LLM call it needs and receives the result, so the sync
+        # and async entry points share one implementation. The last element
+        # of the result names the path that answered: rules, llm_classify,
+        # llm_answer or fallback.
         text = message.strip()
         normalized = self._normalize_text(text)
         lower = normalized.lower()
@@ -28,54 +251,90 @@ class DroneOpsAgent:
         pilots = self.store.get_pilots()
         drones = self.store.get_drones()
         missions = self.store.get_missions()
+        index = self._fleet_index(pilots, drones, missions)
 
         if not text:
-            return "Please provide a request.", {}
+            return "Please provide a request.", {}, "rules"
 
         if lower in {"hi", "hello", "hey", "hii", "hola"}:
             return (
                 "Hi! I can help with pilots, drones, missions, assignments, and conflicts.",
                 {},
+                "rules",
             )
         if lower in {"how are you", "how r u", "how are u"}:
-            return ("I’m good, thanks for asking. How can I help you today?", {})
+            return ("I’m good, thanks for asking. How can I help you today?", {}, "rules")
         if lower in {"what is your name", "what's your name", "your name"}:
-            return ("I’m the Drone Operations Coordinator assistant.", {})
+            return ("I’m the Drone Operations Coordinator assistant.", {}, "rules")
 
         if "help" in lower:
             return (
                 "Try: 'find available mapping pilots in Bangalore', "
-                "'assign PRJ001', 'update pilot P001 status On Leave', "
+                "'assign PRJ001', 'assign all open missions', 'update pilot P001 status On Leave', "
                 "'find available drones with Thermal in Mumbai', "
                 "'detect conflicts', or 'urgent reassignment'.",
                 {},
+                "rules",
             )
 
         if "add pilot" in lower:
-            return self._add_pilot(text, pilots)
+            return (*self._add_pilot(text), "rules")
         if "add drone" in lower:
-            return self._add_drone(text, drones)
+            return (*self._add_drone(text), "rules")
         if "add mission" in lower or "add project" in lower:
-            return self._add_mission(text, missions)
+            return (*self._add_mission(text), "rules")
+
+        # Deterministic fast path; the LLM router only sees what the rules can't place.
+        branch = self._rule_branch(text, lower, pilots)
+        if self.use_llm and self._is_confident(branch, lower, text):
+            handled = self._apply_rules(branch, text, lower, pilots, drones, missions, index)
+            if handled is not None:
+                return (*handled, "rules")
 
         # LLM routing (optional)
         if self.use_llm:
-            routed = self.ollama.classify(text)
+            routed = yield _LLMCall("classify", text)
             if routed and isinstance(routed, dict):
-                handled = self._handle_routed(routed, pilots, drones, missions, text)
+                handled = self._handle_routed(routed, pilots, drones, missions, text, index)
                 if handled[0] != "I didn't understand. Say 'help' for examples.":
-                    return handled
+                    return (*handled, "llm_classify")
 
         # Fuzzy spelling correction fallback
-        corrected = self._fuzzy_correct(text, pilots, drones, missions)
+        corrected = self._fuzzy_correct(text)
         if corrected and corrected != text:
-            return self.handle(corrected)
+            return (yield from self._respond(corrected))
 
-        if re.search(r"\bassign\b", lower) and "assigned" not in lower:
+        handled = self._apply_rules(self._rule_branch(text, lower, pilots), text, lower, pilots, drones, missions, index)
+        if handled is not None:
+            return (*handled, "rules")
+
+        # LLM fallback answer if enabled
+        if self.use_llm:
+            context = self._answer_context(text, pilots, drones, missions)
+            answer = yield _LLMCall("answer", text, context)
+            if answer:
+                return answer, {}, "llm_answer"
+
+        return "I didn't understand. Say 'help' for examples.", {}, "fallback"
+
+    def _apply_rules(
+        self,
+        branch: str | None,
+        text: str,
+        lower: str,
+        pilots: list[dict[str, Any]],
+        drones: list[dict[str, Any]],
+        missions: list[dict[str, Any]],
+        index: FleetIndex,
+    ) -> tuple[str, dict[str, Any]] | None:
+        if branch == "assign_all":
+            return self._assign_all(pilots, drones, missions, index)
+
+        if branch == "assign":
             proj = self._extract_project_id(text)
             if not proj:
                 return "Please specify a project id like PRJ001.", {}
-            rec = recommend_assignment(proj, pilots, drones, missions)
+            rec = recommend_assignment(proj, pilots, drones, missions, index=index)
             if rec.issues:
                 return self._format_assignment_issues(proj, rec.issues), {"issues": rec.issues, "project": proj}
             updated = False
@@ -92,14 +351,15 @@ class DroneOpsAgent:
                         d["status"] = "Assigned"
                         updated = True
             if updated:
-                self.store.update_pilots(pilots)
-                self.store.update_drones(drones)
+                with self.store.batch():
+                    self.store.update_pilots(pilots)
+                    self.store.update_drones(drones)
             return (
                 f"Assigned pilot {rec.pilot.get('name')} and drone {rec.drone.get('drone_id')} to {proj}.",
                 {"pilot": rec.pilot, "drone": rec.drone, "project": proj},
             )
 
-        if "update pilot" in lower or "set pilot" in lower or "make" in lower:
+        if branch == "pilot_status":
             pilot_id = self._extract_pilot_id(text)
             status = self._extract_status(text)
             if not pilot_id:
@@ -118,7 +378,7 @@ class DroneOpsAgent:
                 return f"Pilot {pilot_id} status updated to {status}.", {"pilot_id": pilot_id, "status": status}
             return f"Pilot {pilot_id} not found.", {}
 
-        if "update drone" in lower or "set drone" in lower:
+        if branch == "drone_status":
             drone_id = self._extract_drone_id(text)
             status = self._extract_status(text)
             if not drone_id or not status:
@@ -133,28 +393,26 @@ class DroneOpsAgent:
                 return f"Drone {drone_id} status updated to {status}.", {"drone_id": drone_id, "status": status}
             return f"Drone {drone_id} not found.", {}
 
-        intent = self._classify_intent(lower, text, pilots, drones)
-
-        if intent == "pilots_available":
-            skill = self._extract_skill(text, pilots)
-            cert = self._extract_cert(text, pilots)
-            location = self._extract_location(text, pilots)
-            matches = filter_pilots(pilots, skill, cert, location, available_only=True)
+        if branch == "pilots_available":
+            skill = self._extract_skill(text)
+            cert = self._extract_cert(text)
+            location = self._extract_location(text, "pilots")
+            matches = self._find_pilots(pilots, skill, cert, location, available_only=True, index=index)
             if not matches:
                 return "No available pilots matched.", {"pilots": []}
             names = ", ".join([p.get("name") for p in matches])
             return f"Available pilots: {names}.", {"pilots": matches}
 
-        if intent == "drones_available":
-            capability = self._extract_capability(text, drones)
-            location = self._extract_location(text, drones)
-            matches = filter_drones(drones, capability, location, available_only=True)
+        if branch == "drones_available":
+            capability = self._extract_capability(text)
+            location = self._extract_location(text, "drones")
+            matches = self._find_drones(drones, capability, location, available_only=True, index=index)
             if not matches:
                 return "No available drones matched.", {"drones": []}
             ids = ", ".join([d.get("drone_id") for d in matches])
             return f"Available drones: {ids}.", {"drones": matches}
 
-        if "drone" in lower and ("active" in lower or "assigned" in lower):
+        if branch == "active_drones":
             matches = [d for d in drones if str(d.get("status", "")).lower() == "assigned"]
             if not matches:
                 return "No active/assigned drones.", {"drones": []}
@@ -162,26 +420,24 @@ class DroneOpsAgent:
             return f"Assigned drones: {ids}.", {"drones": matches}
 
         # Location-only query fallback: "who are all in Mumbai"
-        if intent == "pilots_in_location":
-            location = self._extract_location(text, pilots)
-            if location:
-                matches = filter_pilots(pilots, None, None, location, available_only=False)
-                if not matches:
-                    return f"No pilots found in {location}.", {"pilots": []}
-                names = ", ".join([p.get("name") for p in matches])
-                return f"Pilots in {location}: {names}.", {"pilots": matches}
-        if intent == "drones_in_location":
-            location = self._extract_location(text, drones)
-            if location:
-                matches = filter_drones(drones, None, location, available_only=False)
-                if not matches:
-                    return f"No drones found in {location}.", {"drones": []}
-                ids = ", ".join([d.get("drone_id") for d in matches])
-                return f"Drones in {location}: {ids}.", {"drones": matches}
+        if branch == "pilots_in_location":
+            location = self._extract_location(text, "pilots")
+            matches = self._find_pilots(pilots, None, None, location, available_only=False, index=index)
+            if not matches:
+                return f"No pilots found in {location}.", {"pilots": []}
+            names = ", ".join([p.get("name") for p in matches])
+            return f"Pilots in {location}: {names}.", {"pilots": matches}
+        if branch == "drones_in_location":
+            location = self._extract_location(text, "drones")
+            matches = self._find_drones(drones, None, location, available_only=False, index=index)
+            if not matches:
+                return f"No drones found in {location}.", {"drones": []}
+            ids = ", ".join([d.get("drone_id") for d in matches])
+            return f"Drones in {location}: {ids}.", {"drones": matches}
 
-        if intent == "any_available":
-            p_matches = filter_pilots(pilots, None, None, None, available_only=True)
-            d_matches = filter_drones(drones, None, None, available_only=True)
+        if branch == "any_available":
+            p_matches = self._find_pilots(pilots, None, None, None, available_only=True, index=index)
+            d_matches = self._find_drones(drones, None, None, available_only=True, index=index)
             p_names = ", ".join([p.get("name") for p in p_matches]) or "None"
             d_ids = ", ".join([d.get("drone_id") for d in d_matches]) or "None"
             return (
@@ -189,13 +445,13 @@ class DroneOpsAgent:
                 {"pilots": p_matches, "drones": d_matches},
             )
 
-        if "conflict" in lower:
-            conflicts = detect_conflicts(pilots, drones, missions)
+        if branch == "conflicts":
+            conflicts = self._conflicts(pilots, drones, missions)
             if not conflicts:
                 return "No conflicts detected.", {"conflicts": []}
             return "Conflicts found: " + " ".join(conflicts), {"conflicts": conflicts}
 
-        if ("resources" in lower or "assigned to" in lower) and "prj" in lower:
+        if branch == "project_resources":
             proj = self._extract_project_id(text)
             if not proj:
                 return "Please specify a project id like PRJ001.", {}
@@ -210,11 +466,11 @@ class DroneOpsAgent:
                 {"project": proj, "pilots": assigned_pilots, "drones": assigned_drones},
             )
 
-        if "which drone" in lower and "prj" in lower:
+        if branch == "project_drone":
             proj = self._extract_project_id(text)
             if not proj:
                 return "Please specify a project id like PRJ001.", {}
-            rec = recommend_assignment(proj, pilots, drones, missions)
+            rec = recommend_assignment(proj, pilots, drones, missions, index=index)
             if rec.drone:
                 return (
                     f"Recommended drone {rec.drone.get('drone_id')} for {proj}.",
@@ -222,30 +478,77 @@ class DroneOpsAgent:
                 )
             return "No suitable drone found for that project.", {"project": proj, "issues": rec.issues}
 
-        if "assigned" in lower or "assignment" in lower:
+        if branch == "pilot_assignment":
             pilot = self._extract_pilot_by_name(text, pilots)
-            if pilot:
-                assignment = pilot.get("current_assignment")
-                if not assignment or assignment in {"–", "â€–", "-"}:
-                    return f"{pilot.get('name')} is not currently assigned.", {"pilot": pilot}
-                return f"{pilot.get('name')} is currently assigned to {assignment}.", {"pilot": pilot}
+            assignment = pilot.get("current_assignment")
+            if not assignment or assignment in {"–", "â€–", "-"}:
+                return f"{pilot.get('name')} is not currently assigned.", {"pilot": pilot}
+            return f"{pilot.get('name')} is currently assigned to {assignment}.", {"pilot": pilot}
 
-        if "urgent" in lower and "reassign" in lower:
-            plan = urgent_reassignment_plan(missions, pilots, drones)
+        if branch == "urgent_reassign":
+            plan = urgent_reassignment_plan(missions, pilots, drones, index=index, eligibility=index.eligibility())
             return "Urgent reassignment plan: " + " ".join(plan), {"plan": plan}
 
-        # LLM fallback answer if enabled
-        if self.use_llm:
-            context = {
-                "pilots": pilots,
-                "drones": drones,
-                "missions": missions,
-            }
-            answer = self.ollama.answer(text, context)
-            if answer:
-                return answer, {}
+        return None
 
-        return "I didn't understand. Say 'help' for examples.", {}
+    def _wants_assign_all(self, text: str, lower: str) -> bool:
+        return bool(_ASSIGN_ALL.search(lower)) and not self._extract_project_id(text)
+
+    def _rule_branch(self, text: str, lower: str, pilots: list[dict[str, Any]]) -> str | None:
+        # The _apply_rules branch that handles the message; the first trigger
+        # wins, so a message matching several triggers gets the earliest.
+        if self._wants_assign_all(text, lower):
+            return "assign_all"
+        if re.search(r"\bassign\b", lower) and "assigned" not in lower:
+            return "assign"
+        if "update pilot" in lower or "set pilot" in lower or "make" in lower:
+            return "pilot_status"
+        if "update drone" in lower or "set drone" in lower:
+            return "drone_status"
+        intent = self._classify_intent(lower, text)
+        if intent in ("pilots_available", "drones_available"):
+            return intent
+        if "drone" in lower and ("active" in lower or "assigned" in lower):
+            return "active_drones"
+        if intent == "pilots_in_location" and self._extract_location(text, "pilots"):
+            return intent
+        if intent == "drones_in_location" and self._extract_location(text, "drones"):
+            return intent
+        if intent == "any_available":
+            return intent
+        if "conflict" in lower:
+            return "conflicts"
+        if ("resources" in lower or "assigned to" in lower) and "prj" in lower:
+            return "project_resources"
+        if "which drone" in lower and "prj" in lower:
+            return "project_drone"
+        if ("assigned" in lower or "assignment" in lower) and self._extract_pilot_by_name(text, pilots):
+            return "pilot_assignment"
+        if "urgent" in lower and "reassign" in lower:
+            return "urgent_reassign"
+        return None
+
+    def _is_confident(self, branch: str | None, lower: str, text: str) -> bool:
+        # True when the branch that will run can answer outright, so the LLM
+        # router is skipped. Judged on that branch, never on a later trigger
+        # the message also happens to contain.
+        if branch in ("assign", "project_resources", "project_drone"):
+            return bool(self._extract_project_id(text))
+        if branch == "pilot_status":
+            explicit = "update pilot" in lower or "set pilot" in lower
+            return explicit and bool(self._extract_status(text)) and bool(self._extract_pilot_id(text))
+        if branch == "drone_status":
+            return bool(self._extract_status(text)) and bool(self._extract_drone_id(text))
+        return branch in (
+            "assign_all",
+            "pilots_available",
+            "drones_available",
+            "pilots_in_location",
+            "drones_in_location",
+            "any_available",
+            "conflicts",
+            "urgent_reassign",
+        )
 
     def _handle_routed(
         self,
@@ -254,6 +557,7 @@ class DroneOpsAgent:
         drones: list[dict[str, Any]],
         missions: list[dict[str, Any]],
         text: str,
+        index: FleetIndex | None = None,
     ) -> tuple[str, dict[str, Any]]:
         intent = str(routed.get("intent", "unknown"))
         project_id = routed.get("project_id") or self._extract_project_id(text)
@@ -268,22 +572,22 @@ class DroneOpsAgent:
             return "Hi! I can help with pilots, drones, missions, assignments, and conflicts.", {}
 
         if intent == "pilots_available":
-            matches = filter_pilots(pilots, skill, cert, location, available_only=True)
+            matches = self._find_pilots(pilots, skill, cert, location, available_only=True, index=index)
             if not matches:
                 return "No available pilots matched.", {"pilots": []}
             names = ", ".join([p.get("name") for p in matches])
             return f"Available pilots: {names}.", {"pilots": matches}
 
         if intent == "drones_available":
-            matches = filter_drones(drones, capability, location, available_only=True)
+            matches = self._find_drones(drones, capability, location, available_only=True, index=index)
             if not matches:
                 return "No available drones matched.", {"drones": []}
             ids = ", ".join([d.get("drone_id") for d in matches])
             return f"Available drones: {ids}.", {"drones": matches}
 
         if intent == "any_available":
-            p_matches = filter_pilots(pilots, None, None, None, available_only=True)
-            d_matches = filter_drones(drones, None, None, available_only=True)
+            p_matches = self._find_pilots(pilots, None, None, None, available_only=True, index=index)
+            d_matches = self._find_drones(drones, None, None, available_only=True, index=index)
             p_names = ", ".join([p.get("name") for p in p_matches]) or "None"
             d_ids = ", ".join([d.get("drone_id") for d in d_matches]) or "None"
             return (
@@ -292,16 +596,16 @@ class DroneOpsAgent:
             )
 
         if intent == "pilots_in_location":
-            loc = location or self._extract_location(text, pilots)
-            matches = filter_pilots(pilots, None, None, loc, available_only=False)
+            loc = location or self._extract_location(text, "pilots")
+            matches = self._find_pilots(pilots, None, None, loc, available_only=False, index=index)
             if not matches:
                 return f"No pilots found in {loc}.", {"pilots": []}
             names = ", ".join([p.get("name") for p in matches])
             return f"Pilots in {loc}: {names}.", {"pilots": matches}
 
         if intent == "drones_in_location":
-            loc = location or self._extract_location(text, drones)
-            matches = filter_drones(drones, None, loc, available_only=False)
+            loc = location or self._extract_location(text, "drones")
+            matches = self._find_drones(drones, None, loc, available_only=False, index=index)
             if not matches:
                 return f"No drones found in {loc}.", {"drones": []}
             ids = ", ".join([d.get("drone_id") for d in matches])
@@ -310,7 +614,7 @@ class DroneOpsAgent:
         if intent == "assignment_recommend":
             if not project_id:
                 return "Please specify a project id like PRJ001.", {}
-            rec = recommend_assignment(project_id, pilots, drones, missions)
+            rec = recommend_assignment(project_id, pilots, drones, missions, index=index)
             if rec.issues:
                 return self._format_assignment_issues(project_id, rec.issues), {"issues": rec.issues, "project": project_id}
             return (
@@ -321,7 +625,7 @@ class DroneOpsAgent:
         if intent == "assignment_update":
             if not project_id:
                 return "Please specify a project id like PRJ001.", {}
-            rec = recommend_assignment(project_id, pilots, drones, missions)
+            rec = recommend_assignment(project_id, pilots, drones, missions, index=index)
             if rec.issues:
                 return self._format_assignment_issues(project_id, rec.issues), {"issues": rec.issues, "project": project_id}
             updated = False
@@ -338,13 +642,17 @@ class DroneOpsAgent:
                         d["status"] = "Assigned"
                         updated = True
             if updated:
-                self.store.update_pilots(pilots)
-                self.store.update_drones(drones)
+                with self.store.batch():
+                    self.store.update_pilots(pilots)
+                    self.store.update_drones(drones)
             return (
                 f"Assigned pilot {rec.pilot.get('name')} and drone {rec.drone.get('drone_id')} to {project_id}.",
                 {"pilot": rec.pilot, "drone": rec.drone, "project": project_id},
             )
 
+        if intent == "assignment_batch":
+            return self._assign_all(pilots, drones, missions, index)
+
         if intent == "pilot_status_update":
             pilot = self._extract_pilot_by_name(pilot_name or text, pilots)
             if not pilot:
@@ -390,17 +698,54 @@ class DroneOpsAgent:
             )
 
         if intent == "conflicts":
-            conflicts = detect_conflicts(pilots, drones, missions)
+            conflicts = self._conflicts(pilots, drones, missions)
             if not conflicts:
                 return "No conflicts detected.", {"conflicts": []}
             return "Conflicts found: " + " ".join(conflicts), {"conflicts": conflicts}
 
         if intent == "urgent_reassignment":
-            plan = urgent_reassignment_plan(missions, pilots, drones)
+            plan = urgent_reassignment_plan(missions, pilots, drones, index=index, eligibility=index.eligibility())
             return "Urgent reassignment plan: " + " ".join(plan), {"plan": plan}
 
         return "I didn't understand. Say 'help' for examples.", {}
 
+    def _assign_all(
+        self,
+        pilots: list[dict[str, Any]],
+        drones: list[dict[str, Any]],
+        missions: list[dict[str, Any]],
+        index: FleetIndex | None = None,
+    ) -> tuple[str, dict[str, Any]]:
+        plan = recommend_batch_assignment(pilots, drones, missions, index=index)
+        if not plan:
+            return "No open missions to assign.", {"assignments": []}
+        staffed = {proj: rec for proj, rec in plan.items() if not rec.issues}
+        pilot_rows = {p.get("pilot_id"): p for p in pilots}
+        drone_rows = {d.get("drone_id"): d for d in drones}
+        for proj, rec in staffed.items():
+            for row in (pilot_rows.get(rec.pilot.get("pilot_id")), drone_rows.get(rec.drone.get("drone_id"))):
+                if row is not None:
+                    row["current_assignment"] = proj
+                    row["status"] = "Assigned"
+        if staffed:
+            with self.store.batch():
+                self.store.update_pilots(pilots)
+                self.store.update_drones(drones)
+
+        assignments = [{"project": proj, "pilot": rec.pilot, "drone": rec.drone} for proj, rec in staffed.items()]
+        unassigned = {proj: rec.issues for proj, rec in plan.items() if rec.issues}
+        if staffed:
+            parts = [
+                f"{proj} (pilot {rec.pilot.get('name')}, drone {rec.drone.get('drone_id')})"
+                for proj, rec in staffed.items()
+            ]
+            reply = "Assigned " + "; ".join(parts) + "."
+        else:
+            reply = "Could not assign any open missions."
+        if unassigned:
+            reply += " Not staffed: " + ", ".join(unassigned) + "."
+        return reply, {"assignments": assignments, "unassigned": unassigned}
+
     def _parse_kv(self, text: str) -> dict[str, str]:
         pairs = re.findall(r"(\w+)\s*=\s*([^,]+)", text)
         return {k.strip().lower(): v.strip() for k, v in pairs}
@@ -414,60 +759,62 @@ class DroneOpsAgent:
         next_num = (max(nums) + 1) if nums else 1
         return f"{prefix}{next_num:03d}"
 
-    def _add_pilot(self, text: str, pilots: list[dict[str, Any]]) -> tuple[str, dict[str, Any]]:
+    def _add_pilot(self, text: str) -> tuple[str, dict[str, Any]]:
         data = self._parse_kv(text)
         if not data.get("name"):
             return "Usage: add pilot name=..., skills=..., certifications=..., location=..., status=..., available_from=YYYY-MM-DD", {}
-        pilot_id = self._next_id("P", [p.get("pilot_id") for p in pilots])
-        row = {
-            "pilot_id": pilot_id,
-            "name": data.get("name", ""),
-            "skills": data.get("skills", ""),
-            "certifications": data.get("certifications", ""),
-            "location": data.get("location", ""),
-            "status": data.get("status", "Available"),
-            "current_assignment": data.get("current_assignment", "–"),
-            "available_from": data.get("available_from", ""),
-        }
-        pilots.append(row)
-        self.store.update_pilots(pilots)
+        # The id is allocated under the store's writer lock against fresh rows,
+        # so concurrent adds cannot pick the same one.
+        with self.store.batch():
+            pilot_id = self._next_id("P", [p.get("pilot_id") for p in self.store.get_pilots()])
+            row = {
+                "pilot_id": pilot_id,
+                "name": data.get("name", ""),
+                "skills": data.get("skills", ""),
+                "certifications": data.get("certifications", ""),
+                "location": data.get("location", ""),
+                "status": data.get("status", "Available"),
+                "current_assignment": data.get("current_assignment", "–"),
+                "available_from": data.get("available_from", ""),
+            }
+            self.store.insert_pilot(row)
         return f"Pilot {row['name']} added with id {pilot_id}.", {"pilot": row}
 
-    def _add_drone(self, text: str, drones: list[dict[str, Any]]) -> tuple[str, dict[str, Any]]:
+    def _add_drone(self, text: str) -> tuple[str, dict[str, Any]]:
         data = self._parse_kv(text)
         if not data.get("model"):
             return "Usage: add drone model=..., capabilities=..., location=..., status=..., maintenance_due=YYYY-MM-DD", {}
-        drone_id = self._next_id("D", [d.get("drone_id") for d in drones])
-        row = {
-            "drone_id": drone_id,
-            "model": data.get("model", ""),
-            "capabilities": data.get("capabilities", ""),
-            "status": data.get("status", "Available"),
-            "location": data.get("location", ""),
-            "current_assignment": data.get("current_assignment", "–"),
-            "maintenance_due": data.get("maintenance_due", ""),
-        }
-        drones.append(row)
-        self.store.update_drones(drones)
+        with self.store.batch():
+            drone_id = self._next_id("D", [d.get("drone_id") for d in self.store.get_drones()])
+            row = {
+                "drone_id": drone_id,
+                "model": data.get("model", ""),
+                "capabilities": data.get("capabilities", ""),
+                "status": data.get("status", "Available"),
+                "location": data.get("location", ""),
+                "current_assignment": data.get("current_assignment", "–"),
+                "maintenance_due": data.get("maintenance_due", ""),
+            }
+            self.store.insert_drone(row)
         return f"Drone {row['drone_id']} added.", {"drone": row}
 
-    def _add_mission(self, text: str, missions: list[dict[str, Any]]) -> tuple[str, dict[str, Any]]:
+    def _add_mission(self, text: str) -> tuple[str, dict[str, Any]]:
         data = self._parse_kv(text)
         if not data.get("client") or not data.get("location"):
             return "Usage: add mission client=..., location=..., required_skills=..., required_certs=..., start_date=YYYY-MM-DD, end_date=YYYY-MM-DD, priority=High/Standard/Urgent", {}
-        project_id = self._next_id("PRJ", [m.get("project_id") for m in missions])
-        row = {
-            "project_id": project_id,
-            "client": data.get("client", ""),
-            "location": data.get("location", ""),
-            "required_skills": data.get("required_skills", ""),
-            "required_certs": data.get("required_certs", ""),
-            "start_date": data.get("start_date", ""),
-            "end_date": data.get("end_date", ""),
-            "priority": data.get("priority", "Standard"),
-        }
-        missions.append(row)
-        self.store.update_missions(missions)
+        with self.store.batch():
+            project_id = self._next_id("PRJ", [m.get("project_id") for m in self.store.get_missions()])
+            row = {
+                "project_id": project_id,
+                "client": data.get("client", ""),
+                "location": data.get("location", ""),
+                "required_skills": data.get("required_skills", ""),
+                "required_certs": data.get("required_certs", ""),
+                "start_date": data.get("start_date", ""),
+                "end_date": data.get("end_date", ""),
+                "priority": data.get("priority", "Standard"),
+            }
+            self.store.insert_mission(row)
         return f"Mission {project_id} added.", {"mission": row}
 
     def _extract_project_id(self, text: str) -> str | None:
@@ -488,61 +835,28 @@ class DroneOpsAgent:
                 return status
         return None
 
-    def _extract_skill(self, text: str, pilots: list[dict[str, Any]]) -> str | None:
-        skills = set()
-        for p in pilots:
-            for s in p.get("skills", "").split(","):
-                skills.add(s.strip())
-        for s in skills:
-            if s and s.lower() in text.lower():
-                return s
-        return None
+    def _extract(self, text: str) -> Entities:
+        # One pass over the message against the current snapshot's vocabulary.
+        return self._snapshot[2].extract(text)
 
-    def _extract_capability(self, text: str, drones: list[dict[str, Any]]) -> str | None:
-        caps = set()
-        for d in drones:
-            for c in d.get("capabilities", "").split(","):
-                caps.add(c.strip())
-        for c in caps:
-            if c and c.lower() in text.lower():
-                return c
-        return None
+    def _extract_skill(self, text: str) -> str | None:
+        return self._extract(text).skill
 
-    def _extract_cert(self, text: str, pilots: list[dict[str, Any]]) -> str | None:
-        certs = set()
-        for p in pilots:
-            for c in p.get("certifications", "").split(","):
-                certs.add(c.strip())
-        for c in certs:
-            if c and c.lower() in text.lower():
-                return c
-        return None
+    def _extract_capability(self, text: str) -> str | None:
+        return self._extract(text).capability
 
-    def _extract_location(self, text: str, items: list[dict[str, Any]]) -> str | None:
-        locs = {i.get("location", "").strip() for i in items if i.get("location")}
-        for loc in locs:
-            if loc and loc.lower() in text.lower():
-                return loc
-        return None
+    def _extract_cert(self, text: str) -> str | None:
+        return self._extract(text).cert
+
+    def _extract_location(self, text: str, table: str) -> str | None:
+        found = self._extract(text)
+        return found.pilot_location if table == "pilots" else found.drone_location
 
     def _extract_pilot_by_name(self, text: str, pilots: list[dict[str, Any]]) -> dict[str, Any] | None:
-        lower = text.lower()
-        tokens = set(re.findall(r"[a-zA-Z]+", lower))
-        exact_matches = []
-        for p in pilots:
-            name = str(p.get("name", "")).strip().lower()
-            if not name:
-                continue
-            if name in tokens:
-                exact_matches.append(p)
-        if exact_matches:
-            return exact_matches[0]
-        # Fallback to full-name substring only if no token match exists.
-        for p in pilots:
-            name = str(p.get("name", "")).strip().lower()
-            if name and name in lower:
-                return p
-        return None
+        name = self._extract(text).pilot_name
+        if name is None:
+            return None
+        return next((p for p in pilots if str(p.get("name", "")).strip().lower() == name), None)
 
     def _normalize_text(self, text: str) -> str:
         # Light typo normalization for common user input mistakes.
@@ -559,13 +873,7 @@ class DroneOpsAgent:
             lowered = lowered.replace(wrong, right)
         return lowered
 
-    def _fuzzy_correct(
-        self,
-        text: str,
-        pilots: list[dict[str, Any]],
-        drones: list[dict[str, Any]],
-        missions: list[dict[str, Any]],
-    ) -> str | None:
+    def _fuzzy_correct(self, text: str) -> str | None:
         import difflib
 
         tokens = re.findall(r"[A-Za-z]+", text)
@@ -588,12 +896,7 @@ class DroneOpsAgent:
             "status",
             "location",
         }
-        names = {str(p.get("name", "")).lower() for p in pilots if p.get("name")}
-        locations = {str(p.get("location", "")).lower() for p in pilots if p.get("location")}
-        locations |= {str(d.get("location", "")).lower() for d in drones if d.get("location")}
-        projects = {str(m.get("project_id", "")).lower() for m in missions if m.get("project_id")}
-
-        vocab = keywords | names | locations | projects
+        vocab = keywords | self._snapshot[2].words
         if not vocab:
             return None
 
@@ -607,6 +910,23 @@ class DroneOpsAgent:
                 corrected = re.sub(rf"\b{tok}\b", match[0], corrected, flags=re.IGNORECASE)
         return corrected
 
+    def _answer_context(
+        self,
+        text: str,
+        pilots: list[dict[str, Any]],
+        drones: list[dict[str, Any]],
+        missions: list[dict[str, Any]],
+    ) -> dict[str, list[dict[str, Any]]]:
+        # Lexical retrieval for the LLM fallback over a per-snapshot index; see
+        # ContextIndex.search. The prompt budget trims what it returns.
+        generation, context_index = self._context_index
+        if context_index is None or generation != self.store.generation:
+            generation = self.store.generation
+            context_index = ContextIndex(pilots, drones, missions)
+            self._context_index = (generation, context_index)
+        terms = set(re.findall(r"[a-z0-9]+", text.lower())) - _CONTEXT_STOPWORDS
+        return context_index.search(terms)
+
     def _format_assignment_issues(self, project_id: str, issues: list[str]) -> str:
         lines = [f"Could not assign resources for {project_id}."]
         for issue in issues:
@@ -619,13 +939,7 @@ class DroneOpsAgent:
         lines.append("Try: make a pilot available, free a drone from maintenance, or change the mission requirements.")
         return " ".join(lines)
 
-    def _classify_intent(
-        self,
-        lower: str,
-        text: str,
-        pilots: list[dict[str, Any]],
-        drones: list[dict[str, Any]],
-    ) -> str:
+    def _classify_intent(self, lower: str, text: str) -> str:
         tokens = set(re.findall(r"[a-zA-Z]+", lower))
 
         pilot_words = {"pilot", "pilots", "roster", "crew", "operator"}
@@ -634,11 +948,12 @@ class DroneOpsAgent:
         avail_words = {"available", "free", "idle"}
         phrase_any = "who all are" in lower or "who all" in lower
 
-        has_pilot = bool(tokens & pilot_words) or self._mentions_pilot_name(text, pilots)
+        found = self._extract(text)
+        has_pilot = bool(tokens & pilot_words) or found.mentions_pilot
         has_drone = bool(tokens & drone_words)
         has_list = bool(tokens & list_words)
         has_avail = bool(tokens & avail_words)
-        has_location = self._extract_location(text, pilots) or self._extract_location(text, drones)
+        has_location = found.pilot_location or found.drone_location
 
         if has_pilot and has_avail:
             return "pilots_available"
@@ -653,11 +968,3 @@ class DroneOpsAgent:
         if has_list and has_location and not has_drone:
             return "pilots_in_location"
         return "unknown"
-
-    def _mentions_pilot_name(self, text: str, pilots: list[dict[str, Any]]) -> bool:
-        lower = text.lower()
-        for p in pilots:
-            name = str(p.get("name", "")).strip().lower()
-            if name and name in lower:
-                return True
-        return False
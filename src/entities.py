@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator
+
+
+class PatternMatcher:
+    # Aho-Corasick automaton over lower-cased patterns: one pass over a text
+    # reports every occurrence of every pattern, however many there are.
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[str]] = [[]]
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._link()
+
+    def _add(self, pattern: str) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        if pattern not in self._out[state]:
+            self._out[state].append(pattern)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Patterns ending at the fallback state also end here.
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def finditer(self, text: str) -> Iterator[tuple[int, int, str]]:
+        state = 0
+        for position, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for pattern in self._out[state]:
+                yield position + 1 - len(pattern), position + 1, pattern
+
+
+@dataclass
+class Entities:
+    skill: str | None = None
+    cert: str | None = None
+    capability: str | None = None
+    pilot_location: str | None = None
+    drone_location: str | None = None
+    # Lower-cased name of the first pilot in roster order whose name is a
+    # whole word of the message, else of the first whose name appears
+    # anywhere in it. A name rather than a position, so callers look it up in
+    # their own rows, whichever snapshot they hold.
+    pilot_name: str | None = None
+    mentions_pilot: bool = False
+
+
+def _split(value: Any) -> list[str]:
+    return [part.strip() for part in str(value or "").split(",")]
+
+
+class EntityVocabulary:
+    # Every skill, certification, capability, location and pilot name in one
+    # snapshot, compiled into a single matcher. Built once per snapshot, so
+    # extraction costs scale with the message rather than the fleet.
+    def __init__(
+        self,
+        pilots: list[dict[str, Any]],
+        drones: list[dict[str, Any]],
+        missions: list[dict[str, Any]] | None = None,
+    ) -> None:
+        # pattern -> {kind: value as first spelled in the data}
+        self._kinds: dict[str, dict[str, str]] = {}
+        # pilot name -> roster positions carrying it
+        self._names: dict[str, list[int]] = {}
+        for p in pilots:
+            for skill in _split(p.get("skills")):
+                self._term("skill", skill)
+            for cert in _split(p.get("certifications")):
+                self._term("cert", cert)
+            if p.get("location"):
+                self._term("pilot_location", str(p.get("location")).strip())
+        for d in drones:
+            for capability in _split(d.get("capabilities")):
+                self._term("capability", capability)
+            if d.get("location"):
+                self._term("drone_location", str(d.get("location")).strip())
+        for position, p in enumerate(pilots):
+            name = str(p.get("name", "")).strip().lower()
+            if name:
+                self._names.setdefault(name, []).append(position)
+        self._matcher = PatternMatcher(list(self._kinds) + list(self._names))
+        # Known words for spelling correction.
+        self.words = set(self._names)
+        self.words |= {str(p.get("location", "")).lower() for p in pilots if p.get("location")}
+        self.words |= {str(d.get("location", "")).lower() for d in drones if d.get("location")}
+        self.words |= {str(m.get("project_id", "")).lower() for m in missions or [] if m.get("project_id")}
+
+    def _term(self, kind: str, value: str) -> None:
+        if value:
+            self._kinds.setdefault(value.lower(), {}).setdefault(kind, value)
+
+    def extract(self, text: str) -> Entities:
+        # Per kind, the leftmost match wins and the longest breaks ties.
+        lower = text.lower()
+        found = Entities()
+        best: dict[str, tuple[int, int]] = {}
+        word_name: tuple[int, str] | None = None
+        any_name: tuple[int, str] | None = None
+        for start, end, pattern in self._matcher.finditer(lower):
+            for kind, value in self._kinds.get(pattern, {}).items():
+                rank = (start, start - end)
+                if kind not in best or rank < best[kind]:
+                    best[kind] = rank
+                    setattr(found, kind, value)
+            positions = self._names.get(pattern)
+            if positions:
+                first = (positions[0], pattern)
+                any_name = first if any_name is None else min(any_name, first)
+                if _whole_word(lower, start, end, pattern):
+                    word_name = first if word_name is None else min(word_name, first)
+        if any_name is not None:
+            found.mentions_pilot = True
+            found.pilot_name = (word_name or any_name)[1]
+        return found
+
+
+def _whole_word(text: str, start: int, end: int, pattern: str) -> bool:
+    # Matches the agent's word split on [a-zA-Z]+ runs.
+    if not re.fullmatch(r"[a-z]+", pattern):
+        return False
+    before = text[start - 1] if start else ""
+    after = text[end] if end < len(text) else ""
+    return not re.fullmatch(r"[a-zA-Z]", before) and not re.fullmatch(r"[a-zA-Z]", after)
+
+
+def _words(values: Iterable[Any]) -> set[str]:
+    return set(re.findall(r"[a-z0-9]+", " ".join(str(v) for v in values).lower()))
+
+
+class ContextIndex:
+    # Word -> row postings over one snapshot's tables, for lexical retrieval
+    # of LLM answer context. Built once per snapshot, so a question costs the
+    # rows its words hit rather than a re-tokenisation of every row.
+    def __init__(
+        self,
+        pilots: list[dict[str, Any]],
+        drones: list[dict[str, Any]],
+        missions: list[dict[str, Any]],
+    ) -> None:
+        self.tables = {"pilots": pilots, "drones": drones, "missions": missions}
+        # table -> word -> positions of the rows containing it
+        self._postings: dict[str, dict[str, list[int]]] = {}
+        # table -> current_assignment (project_id for missions) -> positions
+        self._linked: dict[str, dict[str, list[int]]] = {}
+        for name, rows in self.tables.items():
+            postings: dict[str, list[int]] = {}
+            linked: dict[str, list[int]] = {}
+            field = "project_id" if name == "missions" else "current_assignment"
+            for position, row in enumerate(rows):
+                for word in _words(row.values()):
+                    postings.setdefault(word, []).append(position)
+                linked.setdefault(str(row.get(field)), []).append(position)
+            self._postings[name] = postings
+            self._linked[name] = linked
+        # Words of each mission's location and requirements.
+        self._required = [
+            _words((m.get("location"), m.get("required_skills"), m.get("required_certs"))) for m in missions
+        ]
+
+    def _hits(self, name: str, words: Iterable[str]) -> dict[int, int]:
+        scores: dict[int, int] = {}
+        for word in words:
+            for position in self._postings[name].get(word, ()):
+                scores[position] = scores.get(position, 0) + 1
+        return scores
+
+    def search(self, terms: set[str]) -> dict[str, list[dict[str, Any]]]:
+        # Rows sharing words with the question plus the rows linked to them
+        # through current_assignment, most relevant first. With no overlap at
+        # all every row is returned.
+        scores = {name: self._hits(name, terms) for name in self.tables}
+        projects = {str(self.tables["missions"][position].get("project_id")) for position in scores["missions"]}
+        projects |= {
+            str(self.tables[name][position].get("current_assignment"))
+            for name in ("pilots", "drones")
+            for position in scores[name]
+        }
+        # Candidates for a matched mission share its location or requirements.
+        required: set[str] = set()
+        for position in scores["missions"]:
+            required |= self._required[position]
+        for name in self.tables:
+            table_scores = scores[name]
+            if name != "missions":
+                for position, hits in self._hits(name, required).items():
+                    table_scores[position] = table_scores.get(position, 0) + hits
+            for project in projects:
+                for position in self._linked[name].get(project, ()):
+                    table_scores[position] = table_scores.get(position, 0) + 1
+        if not any(scores.values()):
+            return {name: list(rows) for name, rows in self.tables.items()}
+        return {
+            name: [rows[position] for position, _ in sorted(scores[name].items(), key=lambda hit: (-hit[1], hit[0]))]
+            for name, rows in self.tables.items()
+        }
@@ -1,16 +1,31 @@
+import atexit
+import json
 import os
-from typing import Any
+import re
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+try:
+    import httpx
+except Exception:
+    httpx = None
 
-class OllamaClient:
-    def __init__(self) -> None:
-        self.base_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
-        self.model = os.getenv("OLLAMA_MODEL", "llama3.1")
+# Read once: os.umask can only be queried by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
-    def classify(self, message: str) -> dict[str, Any] | None:
-        prompt = f"""
+
+def _classify_prompt(message: str) -> str:
+    return f"""
 You are a router for a drone-operations assistant.
 Return a compact JSON object only, no extra text.
 Allowed intents:
@@ -21,6 +36,7 @@ Allowed intents:
 - any_available
 - assignment_recommend
 - assignment_update
+- assignment_batch
 - pilot_status_update
 - drone_status_update
 - pilot_assignment_query
@@ -35,44 +51,420 @@ Extract fields where possible: project_id, pilot_name, pilot_id, drone_id, statu
 User message: {message}
 JSON:
 """
-        try:
-            resp = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt, "stream": False},
-                timeout=15,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            text = data.get("response", "").strip()
-            return _safe_json(text)
-        except Exception:
-            return None
 
-    def answer(self, message: str, context: dict[str, Any]) -> str | None:
-        prompt = f"""
+
+def _compact_context(context: dict[str, Any], budget: int) -> str:
+    # Rows are expected most-relevant first. Tables are filled round-robin
+    # until the rough token estimate (4 chars per token) hits the budget.
+    tables = {name: [{k: v for k, v in row.items() if v not in ("", None)} for row in rows] for name, rows in context.items()}
+    kept: dict[str, list[dict[str, Any]]] = {name: [] for name in tables}
+    used = 0
+    pending = True
+    while pending:
+        pending = False
+        for name, rows in tables.items():
+            position = len(kept[name])
+            if position >= len(rows):
+                continue
+            cost = len(json.dumps(rows[position], separators=(",", ":"))) // 4 + 1
+            if used + cost > budget:
+                continue
+            kept[name].append(rows[position])
+            used += cost
+            pending = True
+    result: dict[str, Any] = dict(kept)
+    omitted = {name: len(rows) - len(kept[name]) for name, rows in tables.items() if len(rows) > len(kept[name])}
+    if omitted:
+        result["omitted"] = omitted
+    return json.dumps(result, separators=(",", ":"), default=str)
+
+
+def _answer_prompt(message: str, context: dict[str, Any]) -> str:
+    budget = int(os.getenv("OLLAMA_CONTEXT_TOKENS", "1500"))
+    return f"""
 You are a helpful assistant for a drone operations coordinator.
 Answer the user's question using the provided data context only.
 If the answer is not in the data, say you don't know.
 Keep it short and clear.
 
 Context (JSON):
-{context}
+{_compact_context(context, budget)}
 
 User question: {message}
 Answer:
 """
+
+
+@dataclass
+class LatencyStats:
+    count: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        avg = self.total_ms / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(avg, 1),
+            "max_ms": round(self.max_ms, 1),
+            "last_ms": round(self.last_ms, 1),
+        }
+
+
+class _Metrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, LatencyStats] = {}
+
+    def record(self, name: str, started: float, ok: bool) -> None:
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            stats = self._calls.setdefault(name, LatencyStats())
+            stats.count += 1
+            stats.errors += 0 if ok else 1
+            stats.total_ms += elapsed
+            stats.max_ms = max(stats.max_ms, elapsed)
+            stats.last_ms = elapsed
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self._calls.items()}
+
+
+class ClassificationCache:
+    # Bounded LRU with a TTL for router results, keyed on model + normalised
+    # message. Optionally mirrored to a JSON file so it survives restarts;
+    # puts only mark it dirty and a timer thread writes the file at most once
+    # per save_delay, so the request path (and the event loop) never does.
+    def __init__(
+        self,
+        max_size: int = 256,
+        ttl: float = 600.0,
+        path: str | None = None,
+        save_delay: float = 5.0,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.save_delay = save_delay
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Serialises file writes so an older snapshot never replaces a newer one.
+        self._save_lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._dirty = False
+        self._timer: threading.Timer | None = None
+        self._load()
+        if self.path:
+            atexit.register(self.flush)
+
+    @classmethod
+    def from_env(cls) -> "ClassificationCache":
+        return cls(
+            max_size=int(os.getenv("OLLAMA_CLASSIFY_CACHE_SIZE", "256")),
+            ttl=float(os.getenv("OLLAMA_CLASSIFY_CACHE_TTL", "600")),
+            path=os.getenv("OLLAMA_CLASSIFY_CACHE_PATH") or None,
+            save_delay=float(os.getenv("OLLAMA_CLASSIFY_CACHE_SAVE_DELAY", "5")),
+        )
+
+    @staticmethod
+    def key(model: str, message: str) -> str:
+        return model + "\n" + re.sub(r"\s+", " ", message.strip().lower())
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._dirty = True
+                if self._timer is None:
+                    self._timer = threading.Timer(self.save_delay, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+    def flush(self) -> None:
+        # Writes pending puts now; called by the timer and on shutdown.
+        with self._save_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                stored = [[k, stamp, v] for k, (stamp, v) in self._entries.items()]
+                self._dirty = False
+            if not self._save(stored):
+                with self._lock:
+                    self._dirty = True
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(stored, list):
+            return
+        now = time.time()
+        for entry in stored[-self.max_size :] if self.max_size > 0 else []:
+            # A hand-edited or foreign file is skipped entry by entry, never fatal.
+            try:
+                key, stamp, value = entry
+                fresh = now - float(stamp) <= self.ttl
+            except (TypeError, ValueError):
+                continue
+            if fresh and isinstance(key, str) and isinstance(value, dict):
+                self._entries[key] = (float(stamp), value)
+
+    def _save(self, stored: list[list[Any]]) -> bool:
+        # A unique temp file next to the target, so processes sharing the
+        # path never write into each other's half-finished file.
+        directory, name = os.path.split(os.path.abspath(self.path))
+        try:
+            fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+        except OSError:
+            return False
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                try:
+                    os.chmod(tmp, stat.S_IMODE(os.stat(self.path).st_mode))
+                except FileNotFoundError:
+                    os.chmod(tmp, 0o666 & ~_UMASK)
+                json.dump(stored, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return False
+        return True
+
+
+class OllamaClient:
+    def __init__(self, classify_cache: ClassificationCache | None = None) -> None:
+        self.base_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
+        self.model = os.getenv("OLLAMA_MODEL", "llama3.1")
+        self.pool_size = int(os.getenv("OLLAMA_POOL_SIZE", "10"))
+        self.retries = int(os.getenv("OLLAMA_RETRIES", "1"))
+        self.backoff = float(os.getenv("OLLAMA_BACKOFF", "0.2"))
+        self.metrics = _Metrics()
+        self.classify_cache = classify_cache or ClassificationCache.from_env()
+        self.session = self._build_session()
+
+    def _build_session(self) -> requests.Session:
+        # Keep-alive connections to Ollama. Only connection failures and
+        # gateway errors are retried; a read timeout already cost the budget.
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=0,
+            status=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=None,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {**self.metrics.snapshot(), "classify_cache": self.classify_cache.stats()}
+
+    def _generate(self, name: str, prompt: str, timeout: float) -> dict[str, Any]:
+        started = time.perf_counter()
+        ok = False
         try:
-            resp = requests.post(
+            resp = self.session.post(
                 f"{self.base_url}/api/generate",
                 json={"model": self.model, "prompt": prompt, "stream": False},
+                timeout=timeout,
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            ok = True
+            return data
+        finally:
+            self.metrics.record(name, started, ok)
+
+    def classify(self, message: str) -> dict[str, Any] | None:
+        key = ClassificationCache.key(self.model, message)
+        cached = self.classify_cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            data = self._generate("classify", _classify_prompt(message), timeout=15)
+            text = data.get("response", "").strip()
+            routed = _safe_json(text)
+        except Exception:
+            return None
+        if isinstance(routed, dict):
+            self.classify_cache.put(key, routed)
+        return routed
+
+    def answer(self, message: str, context: dict[str, Any]) -> str | None:
+        try:
+            data = self._generate("answer", _answer_prompt(message, context), timeout=20)
+            return data.get("response", "").strip() or None
+        except Exception:
+            return None
+
+    def answer_stream(self, message: str, context: dict[str, Any]) -> Iterator[str]:
+        # Yields tokens as Ollama produces them; the timeout bounds the gap
+        # between chunks rather than the whole completion.
+        started = time.perf_counter()
+        first = True
+        ok = False
+        try:
+            with self.session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "prompt": _answer_prompt(message, context), "stream": True},
                 timeout=20,
+                stream=True,
+            ) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines():
+                    chunk = _safe_json(line.decode("utf-8")) if line else None
+                    if not chunk:
+                        continue
+                    token = chunk.get("response", "")
+                    if token:
+                        if first:
+                            self.metrics.record("answer_first_token", started, True)
+                            first = False
+                        yield token
+                    if chunk.get("done"):
+                        break
+            ok = True
+        except Exception:
+            return
+        finally:
+            self.metrics.record("answer_stream", started, ok)
+
+
+class AsyncOllamaClient:
+    # Non-blocking variant over one shared httpx connection pool, so slow
+    # completions do not tie up server worker threads.
+    def __init__(self, classify_cache: ClassificationCache | None = None) -> None:
+        if httpx is None:
+            raise RuntimeError("httpx is required for AsyncOllamaClient.")
+        self.base_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
+        self.model = os.getenv("OLLAMA_MODEL", "llama3.1")
+        self.pool_size = int(os.getenv("OLLAMA_POOL_SIZE", "10"))
+        self.retries = int(os.getenv("OLLAMA_RETRIES", "1"))
+        self.metrics = _Metrics()
+        self.classify_cache = classify_cache or ClassificationCache.from_env()
+        self._client: Any = None
+
+    def _http(self) -> Any:
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            # httpx transports retry connection failures only.
+            transport = httpx.AsyncHTTPTransport(retries=self.retries, limits=limits)
+            self._client = httpx.AsyncClient(base_url=self.base_url, transport=transport)
+        return self._client
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {**self.metrics.snapshot(), "classify_cache": self.classify_cache.stats()}
+
+    async def _generate(self, name: str, prompt: str, timeout: float) -> dict[str, Any]:
+        started = time.perf_counter()
+        ok = False
+        try:
+            resp = await self._http().post(
+                "/api/generate",
+                json={"model": self.model, "prompt": prompt, "stream": False},
+                timeout=timeout,
             )
             resp.raise_for_status()
             data = resp.json()
+            ok = True
+            return data
+        finally:
+            self.metrics.record(name, started, ok)
+
+    async def classify(self, message: str) -> dict[str, Any] | None:
+        key = ClassificationCache.key(self.model, message)
+        cached = self.classify_cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            data = await self._generate("classify", _classify_prompt(message), timeout=15)
+            routed = _safe_json(data.get("response", "").strip())
+        except Exception:
+            return None
+        if isinstance(routed, dict):
+            self.classify_cache.put(key, routed)
+        return routed
+
+    async def answer(self, message: str, context: dict[str, Any]) -> str | None:
+        try:
+            data = await self._generate("answer", _answer_prompt(message, context), timeout=20)
             return data.get("response", "").strip() or None
         except Exception:
             return None
 
+    async def answer_stream(self, message: str, context: dict[str, Any]) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        first = True
+        ok = False
+        try:
+            async with self._http().stream(
+                "POST",
+                "/api/generate",
+                json={"model": self.model, "prompt": _answer_prompt(message, context), "stream": True},
+                timeout=20,
+            ) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    chunk = _safe_json(line) if line else None
+                    if not chunk:
+                        continue
+                    token = chunk.get("response", "")
+                    if token:
+                        if first:
+                            self.metrics.record("answer_first_token", started, True)
+                            first = False
+                        yield token
+                    if chunk.get("done"):
+                        break
+            ok = True
+        except Exception:
+            return
+        finally:
+            self.metrics.record("answer_stream", started, ok)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
 
 def _safe_json(text: str) -> dict[str, Any] | None:
     import json
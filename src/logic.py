@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any
+from functools import lru_cache
+from typing import Any, Iterable, Iterator
 
 from dateutil.parser import parse as parse_date
 
+try:
+    import numpy as np
+except Exception:
+    np = None
+
 
 DATE_FMT = "%Y-%m-%d"
+TABLE_KEY_FIELDS = {"pilots": "pilot_id", "drones": "drone_id", "missions": "project_id"}
 SKILL_TO_CAPABILITY = {
     "Mapping": "RGB",
     "Survey": "RGB",
@@ -27,18 +35,559 @@ def _is_empty_assignment(value: str | None) -> bool:
     return cleaned in {"", "-", "–", "â€–"}
 
 
+@lru_cache(maxsize=8192)
 def _date(value: str) -> datetime:
-    return parse_date(value).replace(tzinfo=None)
+    # Most values are ISO dates; only fall back to dateutil for anything else.
+    try:
+        return datetime.strptime(value.strip(), DATE_FMT)
+    except ValueError:
+        return parse_date(value).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class MissionInterval:
+    # Inclusive range of ordinal day numbers.
+    start: int
+    end: int
+
+    @classmethod
+    def from_dates(cls, start: str, end: str) -> MissionInterval:
+        return cls(_date(start).toordinal(), _date(end).toordinal())
+
+    def overlaps(self, other: MissionInterval) -> bool:
+        return self.start <= other.end and other.start <= self.end
 
 
 def _overlaps(a_start: str, a_end: str, b_start: str, b_end: str) -> bool:
-    return _date(a_start) <= _date(b_end) and _date(b_start) <= _date(a_end)
+    return MissionInterval.from_dates(a_start, a_end).overlaps(MissionInterval.from_dates(b_start, b_end))
 
 
 def normalize_text(value: str) -> str:
     return value.lower().strip()
 
 
+def _optional_date(value: Any) -> datetime | None:
+    if value is None or not str(value).strip():
+        return None
+    try:
+        return _date(str(value))
+    except (ValueError, OverflowError):
+        return None
+
+
+def _token_set(value: Any) -> frozenset[str]:
+    return frozenset(v.lower() for v in _split_list(str(value or "")))
+
+
+class _Record:
+    # Compact, pre-parsed view of a CSV/Sheets row. The raw column values are
+    # kept as-is so to_row() reproduces the original dict exactly.
+    __slots__ = ("_extra", "_order")
+    FIELDS: tuple[str, ...] = ()
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]):
+        rec = cls.__new__(cls)
+        for field in cls.FIELDS:
+            setattr(rec, field, row.get(field, ""))
+        extra = {k: v for k, v in row.items() if k not in cls.FIELDS}
+        rec._extra = extra or None
+        keys = tuple(row)
+        rec._order = None if keys == cls.FIELDS + tuple(extra) else keys
+        rec._derive()
+        return rec
+
+    def _derive(self) -> None:
+        pass
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self._extra:
+            return self._extra.get(key, default)
+        return default
+
+    def to_row(self) -> dict[str, Any]:
+        if self._order is None:
+            row = {field: getattr(self, field) for field in self.FIELDS}
+            if self._extra:
+                row.update(self._extra)
+            return row
+        return {key: self.get(key) for key in self._order}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_row()!r})"
+
+
+class Pilot(_Record):
+    FIELDS = (
+        "pilot_id",
+        "name",
+        "skills",
+        "certifications",
+        "location",
+        "status",
+        "current_assignment",
+        "available_from",
+    )
+    __slots__ = FIELDS + (
+        "skill_set",
+        "cert_set",
+        "status_key",
+        "location_key",
+        "assignment",
+        "available_on",
+        "skill_mask",
+        "cert_mask",
+    )
+
+    def _derive(self) -> None:
+        self.skill_set = _token_set(self.skills)
+        self.cert_set = _token_set(self.certifications)
+        self.skill_mask = 0
+        self.cert_mask = 0
+        self.status_key = normalize_text(str(self.status or ""))
+        self.location_key = normalize_text(str(self.location or ""))
+        assignment = self.current_assignment
+        self.assignment = None if _is_empty_assignment(assignment) else assignment
+        self.available_on = _optional_date(self.available_from)
+
+
+class Drone(_Record):
+    FIELDS = (
+        "drone_id",
+        "model",
+        "capabilities",
+        "status",
+        "location",
+        "current_assignment",
+        "maintenance_due",
+    )
+    __slots__ = FIELDS + (
+        "capability_set",
+        "status_key",
+        "location_key",
+        "assignment",
+        "maintenance_on",
+        "capability_mask",
+    )
+
+    def _derive(self) -> None:
+        self.capability_set = _token_set(self.capabilities)
+        self.capability_mask = 0
+        self.status_key = normalize_text(str(self.status or ""))
+        self.location_key = normalize_text(str(self.location or ""))
+        assignment = self.current_assignment
+        self.assignment = None if _is_empty_assignment(assignment) else assignment
+        self.maintenance_on = _optional_date(self.maintenance_due)
+
+
+class Mission(_Record):
+    FIELDS = (
+        "project_id",
+        "client",
+        "location",
+        "required_skills",
+        "required_certs",
+        "start_date",
+        "end_date",
+        "priority",
+    )
+    __slots__ = FIELDS + (
+        "skill_set",
+        "cert_set",
+        "skill_key",
+        "cert_key",
+        "capability_key",
+        "location_key",
+        "priority_key",
+        "start_on",
+        "end_on",
+        "interval",
+        "skill_bits",
+        "cert_bits",
+        "capability_bits",
+    )
+
+    def _derive(self) -> None:
+        self.skill_set = _token_set(self.required_skills)
+        self.cert_set = _token_set(self.required_certs)
+        # Assignment rules match the requirement string as a single token.
+        self.skill_key = normalize_text(str(self.required_skills or ""))
+        self.cert_key = normalize_text(str(self.required_certs or ""))
+        self.capability_key = SKILL_TO_CAPABILITY.get(self.required_skills, "RGB").lower()
+        self.location_key = normalize_text(str(self.location or ""))
+        self.priority_key = normalize_text(str(self.priority or ""))
+        self.start_on = _optional_date(self.start_date)
+        self.end_on = _optional_date(self.end_date)
+        self.interval = None
+        if self.start_on and self.end_on:
+            self.interval = MissionInterval(self.start_on.toordinal(), self.end_on.toordinal())
+        self.skill_bits = 0
+        self.cert_bits = 0
+        self.capability_bits = 0
+
+
+class Vocabulary:
+    # Interns tokens to bit positions so a token set becomes a single int mask.
+    def __init__(self, seed: Iterable[str] = ()) -> None:
+        self._bits: dict[str, int] = {}
+        for token in seed:
+            self.intern(token)
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+    def intern(self, token: str) -> int:
+        bit = self._bits.get(token)
+        if bit is None:
+            bit = self._bits[token] = len(self._bits)
+        return bit
+
+    def mask(self, tokens: Iterable[str]) -> int:
+        mask = 0
+        for token in tokens:
+            mask |= 1 << self.intern(token)
+        return mask
+
+
+class FleetVocabulary:
+    # One shared encoding for skills, certifications and capabilities.
+    def __init__(self) -> None:
+        self.skills = Vocabulary(k.lower() for k in SKILL_TO_CAPABILITY)
+        self.certs = Vocabulary()
+        self.capabilities = Vocabulary(v.lower() for v in SKILL_TO_CAPABILITY.values())
+
+    def encode(self, rec: _Record) -> _Record:
+        if isinstance(rec, Pilot):
+            rec.skill_mask = self.skills.mask(rec.skill_set)
+            rec.cert_mask = self.certs.mask(rec.cert_set)
+        elif isinstance(rec, Drone):
+            rec.capability_mask = self.capabilities.mask(rec.capability_set)
+        elif isinstance(rec, Mission):
+            # Requirements are single tokens (see Mission._derive), so each is one bit.
+            rec.skill_bits = 1 << self.skills.intern(rec.skill_key)
+            rec.cert_bits = 1 << self.certs.intern(rec.cert_key)
+            rec.capability_bits = 1 << self.capabilities.intern(rec.capability_key)
+        return rec
+
+
+def _has_all(mask: int, required: int) -> bool:
+    return mask & required == required
+
+
+def _pilot_conflicts(p: Pilot, mission: Mission | None) -> list[str]:
+    name, assignment = p.get("name"), p.assignment
+    if mission is None:
+        return [f"Pilot {name} assigned to unknown mission {assignment}."]
+    found = []
+    if not _has_all(p.skill_mask, mission.skill_bits):
+        found.append(f"Pilot {name} lacks required skill for {assignment}.")
+    if not _has_all(p.cert_mask, mission.cert_bits):
+        found.append(f"Pilot {name} lacks required certs for {assignment}.")
+    if p.location_key != mission.location_key:
+        found.append(f"Pilot {name} location mismatch for {assignment}.")
+    return found
+
+
+def _drone_conflicts(d: Drone, mission: Mission | None) -> list[str]:
+    assignment = d.assignment
+    if mission is None:
+        return [f"Drone {d.drone_id} assigned to unknown mission {assignment}."]
+    found = []
+    if d.status_key == "maintenance":
+        found.append(f"Drone {d.drone_id} is in maintenance but assigned to {assignment}.")
+    if d.location_key != mission.location_key:
+        found.append(f"Drone {d.drone_id} location mismatch for {assignment}.")
+    if not _has_all(d.capability_mask, mission.capability_bits):
+        found.append(f"Drone {d.drone_id} lacks capability for {assignment}.")
+    return found
+
+
+class MissionIntervalIndex:
+    # Static interval tree laid out over an array sorted by start day: the
+    # midpoint of every [lo, hi) range is a node and max_end holds the largest
+    # end day in its subtree, so queries prune to O(log M + k).
+    def __init__(self, items: list[tuple[MissionInterval, int]]) -> None:
+        items = sorted(items, key=lambda item: (item[0].start, item[0].end))
+        self._starts = [iv.start for iv, _ in items]
+        self._ends = [iv.end for iv, _ in items]
+        self._ids = [i for _, i in items]
+        self._max_end = [0] * len(items)
+        self._build(0, len(items))
+
+    @classmethod
+    def from_missions(cls, missions: list[dict[str, Any]]) -> MissionIntervalIndex:
+        items = []
+        for i, m in enumerate(missions):
+            try:
+                items.append((MissionInterval.from_dates(m["start_date"], m["end_date"]), i))
+            except (KeyError, ValueError, OverflowError):
+                continue
+        return cls(items)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _build(self, lo: int, hi: int) -> int:
+        if lo >= hi:
+            return -1
+        mid = (lo + hi) // 2
+        self._max_end[mid] = max(self._ends[mid], self._build(lo, mid), self._build(mid + 1, hi))
+        return self._max_end[mid]
+
+    def overlapping(self, interval: MissionInterval) -> list[int]:
+        found: list[int] = []
+        stack = [(0, len(self._ids))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] < interval.start:
+                continue
+            stack.append((lo, mid))
+            if self._starts[mid] <= interval.end:
+                if self._ends[mid] >= interval.start:
+                    found.append(self._ids[mid])
+                stack.append((mid + 1, hi))
+        return found
+
+
+def _mission_overlaps(a: Mission, b: Mission) -> bool:
+    if a.interval and b.interval:
+        return a.interval.overlaps(b.interval)
+    return _overlaps(a.start_date, a.end_date, b.start_date, b.end_date)
+
+
+def _index_records(records: list[_Record], attr: str) -> dict[str, set[int]]:
+    index: dict[str, set[int]] = {}
+    for i, rec in enumerate(records):
+        value = getattr(rec, attr)
+        for key in value if isinstance(value, frozenset) else (value,):
+            index.setdefault(key, set()).add(i)
+    return index
+
+
+def _select_ids(constraints: list[tuple[dict[str, set[int]], str | None]], size: int) -> list[int]:
+    ids: set[int] | None = None
+    # Intersect smallest sets first so the working set shrinks quickly.
+    sets = sorted((index.get(key, set()) for index, key in constraints if key is not None), key=len)
+    for bucket in sets:
+        ids = set(bucket) if ids is None else ids & bucket
+        if not ids:
+            return []
+    if ids is None:
+        return list(range(size))
+    return sorted(ids)
+
+
+class FleetIndex:
+    def __init__(
+        self,
+        pilots: list[dict[str, Any]],
+        drones: list[dict[str, Any]],
+        missions: list[dict[str, Any]] | None = None,
+    ) -> None:
+        self.pilots = pilots
+        self.drones = drones
+        self.missions = missions or []
+        self.vocab = FleetVocabulary()
+        self.pilot_records = [self.vocab.encode(Pilot.from_row(p)) for p in pilots]
+        self.drone_records = [self.vocab.encode(Drone.from_row(d)) for d in drones]
+        self.mission_records = [self.vocab.encode(Mission.from_row(m)) for m in self.missions]
+        self.pilot_by_status = _index_records(self.pilot_records, "status_key")
+        self.pilot_by_location = _index_records(self.pilot_records, "location_key")
+        self.pilot_by_skill = _index_records(self.pilot_records, "skill_set")
+        self.pilot_by_cert = _index_records(self.pilot_records, "cert_set")
+        self.drone_by_status = _index_records(self.drone_records, "status_key")
+        self.drone_by_location = _index_records(self.drone_records, "location_key")
+        self.drone_by_capability = _index_records(self.drone_records, "capability_set")
+        self.mission_by_id: dict[str, dict[str, Any]] = {}
+        self.mission_record_by_id: dict[str, Mission] = {}
+        self.mission_position: dict[str, int] = {}
+        for i, (m, rec) in enumerate(zip(self.missions, self.mission_records)):
+            self.mission_by_id.setdefault(m.get("project_id"), m)
+            self.mission_record_by_id.setdefault(rec.project_id, rec)
+            self.mission_position.setdefault(rec.project_id, i)
+        self.mission_intervals = MissionIntervalIndex(
+            [(rec.interval, i) for i, rec in enumerate(self.mission_records) if rec.interval]
+        )
+        self._eligibility: EligibilityMatrix | None = None
+
+    def eligibility(self) -> EligibilityMatrix | None:
+        # Built lazily; None when numpy is not installed.
+        if self._eligibility is None:
+            self._eligibility = build_eligibility_matrix(self)
+        return self._eligibility
+
+    def pilot_ids(
+        self,
+        status: str | None = None,
+        skill: str | None = None,
+        cert: str | None = None,
+        location: str | None = None,
+    ) -> list[int]:
+        # Keys are matched exactly; None means "no constraint". Every key is a
+        # bucket lookup, so a query is a set intersection; the bitmasks serve
+        # the vectorised eligibility matrix.
+        return _select_ids(
+            [
+                (self.pilot_by_status, status),
+                (self.pilot_by_skill, skill),
+                (self.pilot_by_cert, cert),
+                (self.pilot_by_location, location),
+            ],
+            len(self.pilots),
+        )
+
+    def drone_ids(
+        self,
+        status: str | None = None,
+        capability: str | None = None,
+        location: str | None = None,
+    ) -> list[int]:
+        return _select_ids(
+            [
+                (self.drone_by_status, status),
+                (self.drone_by_capability, capability),
+                (self.drone_by_location, location),
+            ],
+            len(self.drones),
+        )
+
+    def select_pilots(self, **keys: str | None) -> list[dict[str, Any]]:
+        return [self.pilots[i] for i in self.pilot_ids(**keys)]
+
+    def select_drones(self, **keys: str | None) -> list[dict[str, Any]]:
+        return [self.drones[i] for i in self.drone_ids(**keys)]
+
+    def eligible_pilot_ids(self, mission: Mission) -> list[int]:
+        # Same rules as recommend_assignment: available, co-located, qualified,
+        # and not already on a mission whose dates overlap this one.
+        candidates = self.pilot_ids(
+            status="available",
+            skill=mission.skill_key,
+            cert=mission.cert_key,
+            location=mission.location_key,
+        )
+        blocking = set(self.mission_intervals.overlapping(mission.interval)) if mission.interval else None
+        eligible = []
+        for i in candidates:
+            assignment = self.pilot_records[i].assignment
+            if assignment is not None:
+                if blocking is not None:
+                    if self.mission_position.get(assignment) in blocking:
+                        continue
+                else:
+                    assigned = self.mission_record_by_id.get(assignment)
+                    if assigned and _mission_overlaps(mission, assigned):
+                        continue
+            eligible.append(i)
+        return eligible
+
+    def eligible_drone_ids(self, mission: Mission) -> list[int]:
+        location = str(mission.location or "").lower()
+        return self.drone_ids(status="available", capability=mission.capability_key, location=location or None)
+
+
+def _mask_array(masks: list[int], width: int) -> Any:
+    # Python int masks split into 64-bit words, one row per record.
+    words = max(1, (width + 63) // 64)
+    out = np.zeros((len(masks), words), dtype=np.uint64)
+    for w in range(words):
+        shift = 64 * w
+        out[:, w] = np.fromiter(
+            ((m >> shift) & 0xFFFFFFFFFFFFFFFF for m in masks), dtype=np.uint64, count=len(masks)
+        )
+    return out
+
+
+def _has_bit(masks: Any, required: int) -> Any:
+    bit = required.bit_length() - 1
+    return ((masks[:, bit // 64] >> np.uint64(bit % 64)) & np.uint64(1)).astype(bool)
+
+
+def _codes(values: list[str], table: dict[str, int]) -> Any:
+    return np.fromiter((table.setdefault(v, len(table)) for v in values), dtype=np.int64, count=len(values))
+
+
+@dataclass
+class EligibilityMatrix:
+    # Boolean pilots x missions and drones x missions matrices over a
+    # FleetIndex snapshot; column j is index.mission_records[j].
+    index: FleetIndex
+    pilots: Any
+    drones: Any
+
+    def pilot_ids(self, mission_pos: int) -> list[int]:
+        return np.flatnonzero(self.pilots[:, mission_pos]).tolist()
+
+    def drone_ids(self, mission_pos: int) -> list[int]:
+        return np.flatnonzero(self.drones[:, mission_pos]).tolist()
+
+
+def build_eligibility_matrix(index: FleetIndex) -> EligibilityMatrix | None:
+    if np is None:
+        return None
+    pilots, drones, missions = index.pilot_records, index.drone_records, index.mission_records
+    locations: dict[str, int] = {}
+
+    # Pilot side: available, co-located, has the skill and cert tokens, and not
+    # booked on an overlapping mission. Each distinct requirement combination
+    # is evaluated once as a vector over all pilots.
+    vocab = index.vocab
+    skill_masks = _mask_array([p.skill_mask for p in pilots], len(vocab.skills))
+    cert_masks = _mask_array([p.cert_mask for p in pilots], len(vocab.certs))
+    pilot_loc = _codes([p.location_key for p in pilots], locations)
+    pilot_ok = np.array([p.status_key == "available" for p in pilots], dtype=bool)
+
+    combos: dict[tuple[int, int, str], int] = {}
+    mission_combo = _codes([(m.skill_bits, m.cert_bits, m.location_key) for m in missions], combos)
+    combo_cols = np.zeros((len(pilots), len(combos)), dtype=bool)
+    for (skill, cert, location), col in combos.items():
+        combo_cols[:, col] = (
+            pilot_ok
+            & (pilot_loc == locations.setdefault(location, len(locations)))
+            & _has_bit(skill_masks, skill)
+            & _has_bit(cert_masks, cert)
+        )
+    pilot_matrix = combo_cols[:, mission_combo]
+
+    m_start = np.array([m.interval.start if m.interval else 0 for m in missions], dtype=np.int64)
+    m_end = np.array([m.interval.end if m.interval else 0 for m in missions], dtype=np.int64)
+    m_dated = np.array([m.interval is not None for m in missions], dtype=bool)
+    booked = [index.mission_record_by_id.get(p.assignment) if p.assignment is not None else None for p in pilots]
+    a_start = np.array([b.interval.start if b and b.interval else 0 for b in booked], dtype=np.int64)
+    a_end = np.array([b.interval.end if b and b.interval else 0 for b in booked], dtype=np.int64)
+    a_dated = np.array([bool(b and b.interval) for b in booked], dtype=bool)
+    # Only available pilots with a dated booking can be blocked, so the
+    # overlap test runs over those rows alone rather than the full P x M grid.
+    rows = np.flatnonzero(a_dated & pilot_ok)
+    if len(rows):
+        pilot_matrix[rows] &= ~(
+            m_dated[None, :]
+            & (a_start[rows, None] <= m_end[None, :])
+            & (m_start[None, :] <= a_end[rows, None])
+        )
+
+    # Drone side: available, matching capability and (if set) location.
+    cap_masks = _mask_array([d.capability_mask for d in drones], len(vocab.capabilities))
+    drone_loc = _codes([d.location_key for d in drones], locations)
+    drone_ok = np.array([d.status_key == "available" for d in drones], dtype=bool)
+    drone_combos: dict[tuple[int, str], int] = {}
+    drone_combo = _codes([(m.capability_bits, str(m.location or "").lower()) for m in missions], drone_combos)
+    drone_cols = np.zeros((len(drones), len(drone_combos)), dtype=bool)
+    for (capability, location), col in drone_combos.items():
+        match = drone_ok & _has_bit(cap_masks, capability)
+        if location:
+            match &= drone_loc == locations.setdefault(location, len(locations))
+        drone_cols[:, col] = match
+    drone_matrix = drone_cols[:, drone_combo]
+
+    return EligibilityMatrix(index, pilot_matrix, drone_matrix)
+
+
 @dataclass
 class AssignmentRecommendation:
     pilot: dict[str, Any] | None
@@ -46,14 +595,15 @@ class AssignmentRecommendation:
     issues: list[str]
 
 
-def filter_pilots(
-    pilots: list[dict[str, Any]],
+def iter_pilots(
+    pilots: Iterable[dict[str, Any]],
     skill: str | None,
     cert: str | None,
     location: str | None,
     available_only: bool = True,
-) -> list[dict[str, Any]]:
-    results = []
+) -> Iterator[dict[str, Any]]:
+    # Lazy variant of filter_pilots: rows are checked as they are pulled, so
+    # callers that need only the first match stop scanning there.
     for p in pilots:
         if available_only and normalize_text(p.get("status", "")) != "available":
             continue
@@ -67,17 +617,33 @@ def filter_pilots(
                 continue
         if location and normalize_text(p.get("location", "")) != location.lower():
             continue
-        results.append(p)
-    return results
+        yield p
 
 
-def filter_drones(
-    drones: list[dict[str, Any]],
-    capability: str | None,
+def filter_pilots(
+    pilots: list[dict[str, Any]],
+    skill: str | None,
+    cert: str | None,
     location: str | None,
     available_only: bool = True,
+    index: FleetIndex | None = None,
 ) -> list[dict[str, Any]]:
-    results = []
+    if index is not None:
+        return index.select_pilots(
+            status="available" if available_only else None,
+            skill=skill.lower() if skill else None,
+            cert=cert.lower() if cert else None,
+            location=location.lower() if location else None,
+        )
+    return list(iter_pilots(pilots, skill, cert, location, available_only))
+
+
+def iter_drones(
+    drones: Iterable[dict[str, Any]],
+    capability: str | None,
+    location: str | None,
+    available_only: bool = True,
+) -> Iterator[dict[str, Any]]:
     for d in drones:
         if available_only and normalize_text(d.get("status", "")) != "available":
             continue
@@ -87,157 +653,495 @@ def filter_drones(
                 continue
         if location and normalize_text(d.get("location", "")) != location.lower():
             continue
-        results.append(d)
-    return results
+        yield d
 
 
-def recommend_assignment(
-    project_id: str,
-    pilots: list[dict[str, Any]],
+def filter_drones(
     drones: list[dict[str, Any]],
-    missions: list[dict[str, Any]],
-) -> AssignmentRecommendation:
-    mission = next((m for m in missions if m.get("project_id") == project_id), None)
-    if not mission:
-        return AssignmentRecommendation(None, None, [f"Unknown project: {project_id}"])
+    capability: str | None,
+    location: str | None,
+    available_only: bool = True,
+    index: FleetIndex | None = None,
+) -> list[dict[str, Any]]:
+    if index is not None:
+        return index.select_drones(
+            status="available" if available_only else None,
+            capability=capability.lower() if capability else None,
+            location=location.lower() if location else None,
+        )
+    return list(iter_drones(drones, capability, location, available_only))
+
 
-    required_skill = mission.get("required_skills", "")
-    required_cert = mission.get("required_certs", "")
-    location = mission.get("location", "")
+def _eligible_pilots(
+    pilots: Iterable[dict[str, Any]], missions: list[dict[str, Any]], mission: dict[str, Any]
+) -> Iterator[dict[str, Any]]:
+    required_skill = normalize_text(mission.get("required_skills", ""))
+    required_cert = normalize_text(mission.get("required_certs", ""))
+    location = normalize_text(mission.get("location", ""))
     start = mission.get("start_date", "")
     end = mission.get("end_date", "")
-
-    eligible_pilots = []
-    issues = []
     for p in pilots:
         if normalize_text(p.get("status", "")) != "available":
             continue
-        if normalize_text(p.get("location", "")) != normalize_text(location):
+        if normalize_text(p.get("location", "")) != location:
             continue
         skills = [s.lower() for s in _split_list(p.get("skills", ""))]
-        if normalize_text(required_skill) not in skills:
+        if required_skill not in skills:
             continue
         certs = [c.lower() for c in _split_list(p.get("certifications", ""))]
-        if normalize_text(required_cert) not in certs:
+        if required_cert not in certs:
             continue
         if not _is_empty_assignment(p.get("current_assignment")):
             assigned = next((m for m in missions if m.get("project_id") == p.get("current_assignment")), None)
             if assigned and _overlaps(start, end, assigned["start_date"], assigned["end_date"]):
                 continue
-        eligible_pilots.append(p)
+        yield p
 
-    required_capability = SKILL_TO_CAPABILITY.get(required_skill, "RGB")
-    eligible_drones = filter_drones(drones, required_capability, location, available_only=True)
 
-    if not eligible_pilots:
+def recommend_assignment(
+    project_id: str,
+    pilots: list[dict[str, Any]],
+    drones: list[dict[str, Any]],
+    missions: list[dict[str, Any]],
+    index: FleetIndex | None = None,
+    eligibility: EligibilityMatrix | None = None,
+) -> AssignmentRecommendation:
+    if eligibility is not None:
+        index = eligibility.index
+    if index is not None:
+        mission = index.mission_by_id.get(project_id)
+    else:
+        mission = next((m for m in missions if m.get("project_id") == project_id), None)
+    if not mission:
+        return AssignmentRecommendation(None, None, [f"Unknown project: {project_id}"])
+
+    issues = []
+    if eligibility is not None:
+        pos = index.mission_position[project_id]
+        eligible_pilots = [index.pilots[i] for i in eligibility.pilot_ids(pos)]
+        eligible_drones = [index.drones[i] for i in eligibility.drone_ids(pos)]
+    elif index is not None:
+        target = index.mission_record_by_id[project_id]
+        eligible_pilots = [index.pilots[i] for i in index.eligible_pilot_ids(target)]
+        eligible_drones = [index.drones[i] for i in index.eligible_drone_ids(target)]
+    else:
+        # Only the first match of each is used, so the scans stop there.
+        required_capability = SKILL_TO_CAPABILITY.get(mission.get("required_skills", ""), "RGB")
+        eligible_pilots = _eligible_pilots(pilots, missions, mission)
+        eligible_drones = iter_drones(drones, required_capability, mission.get("location", ""), available_only=True)
+
+    pilot = next(iter(eligible_pilots), None)
+    drone = next(iter(eligible_drones), None)
+    if pilot is None:
         issues.append("No available pilot meets skill, cert, and location requirements.")
-    if not eligible_drones:
+    if drone is None:
         issues.append("No available drone matches capability and location requirements.")
-
-    pilot = eligible_pilots[0] if eligible_pilots else None
-    drone = eligible_drones[0] if eligible_drones else None
     return AssignmentRecommendation(pilot, drone, issues)
 
 
+PRIORITY_RANK = {"urgent": 0, "high": 1, "standard": 2, "low": 3}
+
+
+def _match(order: list[int], edges: dict[int, list[int]]) -> dict[int, int]:
+    # Augmenting-path bipartite matching (Kuhn). Roots are tried in priority
+    # order and an augmentation never unmatches an earlier root, so the result
+    # is a maximum matching that also favours higher-priority missions.
+    owner: dict[int, int] = {}
+    matched: dict[int, int] = {}
+    for root in order:
+        via: dict[int, int] = {}
+        stack = [(root, iter(edges.get(root, ())))]
+        free = None
+        while stack and free is None:
+            left, options = stack[-1]
+            for right in options:
+                if right in via:
+                    continue
+                via[right] = left
+                if right not in owner:
+                    free = right
+                else:
+                    stack.append((owner[right], iter(edges.get(owner[right], ()))))
+                break
+            else:
+                stack.pop()
+        if free is None:
+            continue
+        right = free
+        while True:
+            left = via[right]
+            previous = matched.get(left)
+            matched[left] = right
+            owner[right] = left
+            if left == root:
+                break
+            right = previous
+    return matched
+
+
+def recommend_batch_assignment(
+    pilots: list[dict[str, Any]],
+    drones: list[dict[str, Any]],
+    missions: list[dict[str, Any]],
+    index: FleetIndex | None = None,
+) -> dict[str, AssignmentRecommendation]:
+    if index is None:
+        index = FleetIndex(pilots, drones, missions)
+
+    taken = {p.current_assignment for p in index.pilot_records}
+    taken |= {d.current_assignment for d in index.drone_records}
+    open_missions: list[int] = []
+    seen: set[str] = set()
+    for i, m in enumerate(index.mission_records):
+        if m.project_id in seen or m.project_id in taken:
+            continue
+        seen.add(m.project_id)
+        open_missions.append(i)
+    open_missions.sort(
+        key=lambda i: (
+            PRIORITY_RANK.get(index.mission_records[i].priority_key, len(PRIORITY_RANK)),
+            index.mission_records[i].interval.start if index.mission_records[i].interval else 0,
+            i,
+        )
+    )
+
+    pilot_edges = {i: index.eligible_pilot_ids(index.mission_records[i]) for i in open_missions}
+    drone_edges = {i: index.eligible_drone_ids(index.mission_records[i]) for i in open_missions}
+
+    # A mission needs both a pilot and a drone. Missions missing either kind
+    # of candidate can never be staffed; after that, drop the lowest-priority
+    # half-staffed mission one round at a time and re-match, so resources it
+    # held can go to missions that can use both.
+    active = [i for i in open_missions if pilot_edges[i] and drone_edges[i]]
+    while True:
+        pilot_match = _match(active, pilot_edges)
+        drone_match = _match(active, drone_edges)
+        unstaffed = [i for i in active if i not in pilot_match or i not in drone_match]
+        if not unstaffed:
+            break
+        active.remove(unstaffed[-1])
+
+    # Dropped missions get any pilot/drone pair still free in the final state.
+    used_pilots = set(pilot_match.values())
+    used_drones = set(drone_match.values())
+    for i in open_missions:
+        if i in pilot_match:
+            continue
+        free_pilot = next((r for r in pilot_edges[i] if r not in used_pilots), None)
+        free_drone = next((r for r in drone_edges[i] if r not in used_drones), None)
+        if free_pilot is not None and free_drone is not None:
+            pilot_match[i] = free_pilot
+            drone_match[i] = free_drone
+            used_pilots.add(free_pilot)
+            used_drones.add(free_drone)
+
+    results: dict[str, AssignmentRecommendation] = {}
+    for i in open_missions:
+        project_id = index.mission_records[i].project_id
+        if i in pilot_match and i in drone_match:
+            results[project_id] = AssignmentRecommendation(
+                index.pilots[pilot_match[i]], index.drones[drone_match[i]], []
+            )
+            continue
+        issues = []
+        if not pilot_edges[i]:
+            issues.append("No available pilot meets skill, cert, and location requirements.")
+        elif all(r in used_pilots for r in pilot_edges[i]):
+            issues.append("All eligible pilots are committed to other missions.")
+        if not drone_edges[i]:
+            issues.append("No available drone matches capability and location requirements.")
+        elif all(r in used_drones for r in drone_edges[i]):
+            issues.append("All eligible drones are committed to other missions.")
+        if not issues:
+            issues.append("Could not staff both a pilot and a drone for this mission.")
+        results[project_id] = AssignmentRecommendation(None, None, issues)
+    return results
+
+
 def detect_conflicts(
     pilots: list[dict[str, Any]],
     drones: list[dict[str, Any]],
     missions: list[dict[str, Any]],
+    index: FleetIndex | None = None,
 ) -> list[str]:
+    if index is None:
+        index = FleetIndex(pilots, drones, missions)
     conflicts: list[str] = []
-    mission_map = {m["project_id"]: m for m in missions}
+    mission_map = {m.project_id: m for m in index.mission_records}
 
     # Pilot assignment conflicts
-    for p in pilots:
-        assignment = p.get("current_assignment")
-        if not _is_empty_assignment(assignment):
-            mission = mission_map.get(assignment)
-            if not mission:
-                conflicts.append(f"Pilot {p.get('name')} assigned to unknown mission {assignment}.")
-                continue
-            skills = [s.lower() for s in _split_list(p.get("skills", ""))]
-            if normalize_text(mission.get("required_skills", "")) not in skills:
-                conflicts.append(f"Pilot {p.get('name')} lacks required skill for {assignment}.")
-            certs = [c.lower() for c in _split_list(p.get("certifications", ""))]
-            if normalize_text(mission.get("required_certs", "")) not in certs:
-                conflicts.append(f"Pilot {p.get('name')} lacks required certs for {assignment}.")
-            if normalize_text(p.get("location", "")) != normalize_text(mission.get("location", "")):
-                conflicts.append(f"Pilot {p.get('name')} location mismatch for {assignment}.")
+    for p in index.pilot_records:
+        if p.assignment is not None:
+            conflicts.extend(_pilot_conflicts(p, mission_map.get(p.assignment)))
 
     # Drone assignment conflicts
-    for d in drones:
-        assignment = d.get("current_assignment")
-        if not _is_empty_assignment(assignment):
-            mission = mission_map.get(assignment)
-            if not mission:
-                conflicts.append(f"Drone {d.get('drone_id')} assigned to unknown mission {assignment}.")
-                continue
-            if normalize_text(d.get("status", "")) == "maintenance":
-                conflicts.append(f"Drone {d.get('drone_id')} is in maintenance but assigned to {assignment}.")
-            if normalize_text(d.get("location", "")) != normalize_text(mission.get("location", "")):
-                conflicts.append(f"Drone {d.get('drone_id')} location mismatch for {assignment}.")
-            required_skill = mission.get("required_skills", "")
-            required_cap = SKILL_TO_CAPABILITY.get(required_skill, "RGB").lower()
-            caps = [c.lower() for c in _split_list(d.get("capabilities", ""))]
-            if required_cap not in caps:
-                conflicts.append(f"Drone {d.get('drone_id')} lacks capability for {assignment}.")
+    for d in index.drone_records:
+        if d.assignment is not None:
+            conflicts.extend(_drone_conflicts(d, mission_map.get(d.assignment)))
 
     # Overlapping pilot assignments (based on mission dates)
-    for p in pilots:
-        assignment = p.get("current_assignment")
-        if _is_empty_assignment(assignment):
+    ordered = index.mission_records
+    for p in index.pilot_records:
+        if p.assignment is None:
             continue
-        m1 = mission_map.get(assignment)
-        if not m1:
+        m1 = mission_map.get(p.assignment)
+        if not m1 or not m1.interval:
             continue
-        for m2 in missions:
-            if m2["project_id"] == m1["project_id"]:
-                continue
-            if _overlaps(m1["start_date"], m1["end_date"], m2["start_date"], m2["end_date"]):
-                if assignment == m1["project_id"]:
-                    conflicts.append(
-                        f"Pilot {p.get('name')} assigned to {assignment} overlaps with {m2['project_id']}."
-                    )
-                break
+        # Report the first overlapping mission in table order.
+        hits = [i for i in index.mission_intervals.overlapping(m1.interval) if ordered[i].project_id != m1.project_id]
+        if hits:
+            conflicts.append(
+                f"Pilot {p.get('name')} assigned to {p.assignment} overlaps with {ordered[min(hits)].project_id}."
+            )
 
     # Pilot-drone location mismatch for same assignment
-    drone_by_assignment = {d.get("current_assignment"): d for d in drones if d.get("current_assignment")}
-    for p in pilots:
-        assignment = p.get("current_assignment")
-        if not _is_empty_assignment(assignment) and assignment in drone_by_assignment:
-            d = drone_by_assignment[assignment]
-            if normalize_text(p.get("location", "")) != normalize_text(d.get("location", "")):
+    drone_by_assignment = {d.current_assignment: d for d in index.drone_records if d.current_assignment}
+    for p in index.pilot_records:
+        if p.assignment is not None and p.current_assignment in drone_by_assignment:
+            d = drone_by_assignment[p.current_assignment]
+            if p.location_key != d.location_key:
                 conflicts.append(
-                    f"Pilot {p.get('name')} and drone {d.get('drone_id')} are in different locations for {assignment}."
+                    f"Pilot {p.get('name')} and drone {d.drone_id} are in different locations for {p.assignment}."
                 )
 
     return conflicts
 
 
+class ConflictEngine:
+    # Keeps the detect_conflicts() result current from row-level changes.
+    # Rule output is stored per pilot/drone, so a change re-evaluates only the
+    # entities that touch the changed row. Output order matches
+    # detect_conflicts: section by section, rows in table order.
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self.stale = True
+        self._fallback: tuple[list, list, list] | None = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._seq = 0
+        self._vocab = FleetVocabulary()
+        self._pilots: dict[str, Pilot] = {}
+        self._drones: dict[str, Drone] = {}
+        self._missions: dict[str, Mission] = {}
+        self._order: dict[tuple[str, str], int] = {}
+        self._mission_by_seq: dict[int, Mission] = {}
+        self._tree = MissionIntervalIndex([])
+        self._pilots_by_assignment: dict[str, set[str]] = {}
+        self._drones_by_assignment: dict[str, set[str]] = {}
+        self._pilot_checks: dict[str, list[str]] = {}
+        self._drone_checks: dict[str, list[str]] = {}
+        self._overlap_checks: dict[str, str] = {}
+        self._pair_checks: dict[str, str] = {}
+
+    def rebuild(
+        self,
+        pilots: list[dict[str, Any]],
+        drones: list[dict[str, Any]],
+        missions: list[dict[str, Any]],
+    ) -> None:
+        with self._lock:
+            self._reset()
+            self.stale = False
+            self._fallback = None
+            # Duplicate ids cannot be tracked per row; recompute in full instead.
+            for rows, field in ((pilots, "pilot_id"), (drones, "drone_id"), (missions, "project_id")):
+                if len({r.get(field) for r in rows}) != len(rows):
+                    self._fallback = (list(pilots), list(drones), list(missions))
+                    return
+            for m in missions:
+                self._put("missions", Mission.from_row(m))
+            self._rebuild_tree()
+            for d in drones:
+                self._put("drones", Drone.from_row(d))
+            for p in pilots:
+                self._put("pilots", Pilot.from_row(p))
+            for drone_id in self._drones:
+                self._check_drone(drone_id)
+            for pilot_id in self._pilots:
+                self._check_pilot(pilot_id)
+
+    def apply(self, table: str, key: str | None, row: dict[str, Any] | None) -> None:
+        with self._lock:
+            if self.stale:
+                return
+            if key is None or self._fallback is not None:
+                self.stale = True
+                return
+            if table == "pilots":
+                self._apply_pilot(key, row)
+            elif table == "drones":
+                self._apply_drone(key, row)
+            elif table == "missions":
+                self._apply_mission(key, row)
+
+    def conflicts(self) -> list[str]:
+        with self._lock:
+            if self._fallback is not None:
+                return detect_conflicts(*self._fallback)
+            out: list[str] = []
+            for checks, table in (
+                (self._pilot_checks, "pilots"),
+                (self._drone_checks, "drones"),
+                (self._overlap_checks, "pilots"),
+                (self._pair_checks, "pilots"),
+            ):
+                for key in sorted(checks, key=lambda k: self._order[(table, k)]):
+                    found = checks[key]
+                    out.extend(found if isinstance(found, list) else [found])
+            return out
+
+    def _put(self, table: str, rec: _Record) -> None:
+        self._vocab.encode(rec)
+        key = rec.get(TABLE_KEY_FIELDS[table])
+        if (table, key) not in self._order:
+            self._seq += 1
+            self._order[(table, key)] = self._seq
+        if table == "pilots":
+            self._pilots[key] = rec
+            if rec.assignment is not None:
+                self._pilots_by_assignment.setdefault(rec.current_assignment, set()).add(key)
+        elif table == "drones":
+            self._drones[key] = rec
+            if rec.current_assignment:
+                self._drones_by_assignment.setdefault(rec.current_assignment, set()).add(key)
+        else:
+            self._missions[key] = rec
+            self._mission_by_seq[self._order[(table, key)]] = rec
+
+    def _drop(self, table: str, key: str, keep_order: bool = False) -> _Record | None:
+        if table == "pilots":
+            rec = self._pilots.pop(key, None)
+            if rec is not None and rec.assignment is not None:
+                self._pilots_by_assignment.get(rec.current_assignment, set()).discard(key)
+            for checks in (self._pilot_checks, self._overlap_checks, self._pair_checks):
+                checks.pop(key, None)
+        elif table == "drones":
+            rec = self._drones.pop(key, None)
+            if rec is not None and rec.current_assignment:
+                self._drones_by_assignment.get(rec.current_assignment, set()).discard(key)
+            self._drone_checks.pop(key, None)
+        else:
+            rec = self._missions.pop(key, None)
+            if rec is not None:
+                self._mission_by_seq.pop(self._order[(table, key)], None)
+        if not keep_order:
+            self._order.pop((table, key), None)
+        return rec
+
+    def _rebuild_tree(self) -> None:
+        # Mission edits are rare next to status changes; a static rebuild is O(M log M).
+        self._tree = MissionIntervalIndex(
+            [(m.interval, seq) for seq, m in self._mission_by_seq.items() if m.interval]
+        )
+
+    def _apply_pilot(self, key: str, row: dict[str, Any] | None) -> None:
+        self._drop("pilots", key, keep_order=row is not None)
+        if row is not None:
+            self._put("pilots", Pilot.from_row(row))
+            self._check_pilot(key)
+
+    def _apply_drone(self, key: str, row: dict[str, Any] | None) -> None:
+        affected: set[str] = set()
+        old = self._drop("drones", key, keep_order=row is not None)
+        if old is not None and old.current_assignment:
+            affected |= self._pilots_by_assignment.get(old.current_assignment, set())
+        if row is not None:
+            rec = Drone.from_row(row)
+            self._put("drones", rec)
+            self._check_drone(key)
+            if rec.current_assignment:
+                affected |= self._pilots_by_assignment.get(rec.current_assignment, set())
+        for pilot_id in affected:
+            self._check_pilot(pilot_id)
+
+    def _apply_mission(self, key: str, row: dict[str, Any] | None) -> None:
+        new = Mission.from_row(row) if row is not None else None
+        touched = {key}
+        for rec in (self._missions.get(key), new):
+            if rec is not None and rec.interval:
+                touched.update(self._mission_by_seq[seq].project_id for seq in self._tree.overlapping(rec.interval))
+        self._drop("missions", key, keep_order=new is not None)
+        if new is not None:
+            self._put("missions", new)
+        self._rebuild_tree()
+        for project_id in touched:
+            for pilot_id in list(self._pilots_by_assignment.get(project_id, ())):
+                self._check_pilot(pilot_id)
+        for drone_id in list(self._drones_by_assignment.get(key, ())):
+            self._check_drone(drone_id)
+
+    def _check_pilot(self, key: str) -> None:
+        for checks in (self._pilot_checks, self._overlap_checks, self._pair_checks):
+            checks.pop(key, None)
+        p = self._pilots[key]
+        assignment = p.assignment
+        if assignment is None:
+            return
+        name = p.get("name")
+        mission = self._missions.get(assignment)
+        found = _pilot_conflicts(p, mission)
+        if mission is not None and mission.interval:
+            hits = [
+                seq
+                for seq in self._tree.overlapping(mission.interval)
+                if self._mission_by_seq[seq].project_id != mission.project_id
+            ]
+            if hits:
+                other = self._mission_by_seq[min(hits)].project_id
+                self._overlap_checks[key] = f"Pilot {name} assigned to {assignment} overlaps with {other}."
+        if found:
+            self._pilot_checks[key] = found
+        drone_ids = self._drones_by_assignment.get(assignment)
+        if drone_ids:
+            drone = self._drones[max(drone_ids, key=lambda k: self._order[("drones", k)])]
+            if p.location_key != drone.location_key:
+                self._pair_checks[key] = (
+                    f"Pilot {name} and drone {drone.drone_id} are in different locations for {assignment}."
+                )
+
+    def _check_drone(self, key: str) -> None:
+        self._drone_checks.pop(key, None)
+        d = self._drones[key]
+        assignment = d.assignment
+        if assignment is None:
+            return
+        found = _drone_conflicts(d, self._missions.get(assignment))
+        if found:
+            self._drone_checks[key] = found
+
+
 def urgent_reassignment_plan(
     missions: list[dict[str, Any]],
     pilots: list[dict[str, Any]],
     drones: list[dict[str, Any]],
+    index: FleetIndex | None = None,
+    eligibility: EligibilityMatrix | None = None,
 ) -> list[str]:
     recommendations: list[str] = []
     urgent = [m for m in missions if normalize_text(m.get("priority", "")) in ("urgent", "high")]
     if not urgent:
         return ["No urgent or high-priority missions found."]
 
+    # The donor pilot does not depend on the urgent mission, so find it once.
+    unset = object()
+    candidate: Any = unset
     for m in urgent:
-        rec = recommend_assignment(m["project_id"], pilots, drones, missions)
+        rec = recommend_assignment(m["project_id"], pilots, drones, missions, index=index, eligibility=eligibility)
         if rec.pilot and rec.drone and not rec.issues:
             continue
-        # Find a pilot from a lower priority mission
-        lower = [x for x in missions if normalize_text(x.get("priority", "")) in ("standard", "low")]
-        candidate = None
-        for lm in lower:
-            for p in pilots:
-                if p.get("current_assignment") == lm["project_id"]:
-                    candidate = p
+        if candidate is unset:
+            # Find a pilot from a lower priority mission
+            lower = [x for x in missions if normalize_text(x.get("priority", "")) in ("standard", "low")]
+            candidate = None
+            for lm in lower:
+                for p in pilots:
+                    if p.get("current_assignment") == lm["project_id"]:
+                        candidate = p
+                        break
+                if candidate:
                     break
-            if candidate:
-                break
         if candidate:
             recommendations.append(
                 f"Consider reassigning pilot {candidate.get('name')} from {candidate.get('current_assignment')} "
@@ -1,7 +1,31 @@
 import csv
+import hashlib
+import io
+import json
 import os
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator
+
+from .logic import TABLE_KEY_FIELDS, filter_drones, filter_pilots, normalize_text
+
+try:
+    import fcntl
+except Exception:
+    fcntl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+except Exception:
+    pa = None
+    pc = None
 
 try:
     import gspread
@@ -11,19 +35,431 @@ except Exception:
     Credentials = None
 
 
-def _parse_csv(path: str) -> list[dict[str, Any]]:
+def iter_csv(path: str) -> Iterator[dict[str, Any]]:
+    # Rows are parsed as they are pulled; the file closes once the scan ends.
     with open(path, "r", encoding="utf-8") as f:
-        return list(csv.DictReader(f))
+        yield from csv.DictReader(f)
+
+
+def dump_csv(rows: Iterable[dict[str, Any]], chunk_size: int = 65536) -> Iterator[str]:
+    # Inverse of iter_csv: CSV text in chunks of about chunk_size characters,
+    # header taken from the first row, so a lazy source is never held whole.
+    buffer = io.StringIO()
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
 
 
-def _write_csv(path: str, rows: list[dict[str, Any]]) -> None:
-    if not rows:
-        return
-    with open(path, "w", encoding="utf-8", newline="") as f:
+def _parse_csv(path: str) -> list[dict[str, Any]]:
+    return list(iter_csv(path))
+
+
+# Read once: os.umask can only be queried by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _stage(path: str, binary: bool, write: Callable[[Any], None]) -> str:
+    # Written and fsynced next to the target so os.replace stays on one
+    # filesystem; readers see either the old file or the new one, never a
+    # truncated one. mkstemp creates 0600 files, so the temp file takes the
+    # target's mode (or the umask default for a new file) before the swap.
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            try:
+                mode = stat.S_IMODE(os.stat(path).st_mode)
+            except FileNotFoundError:
+                mode = 0o666 & ~_UMASK
+            os.chmod(tmp, mode)
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return tmp
+
+
+def _stage_csv(path: str, rows: list[dict[str, Any]]) -> str:
+    def write(f: Any) -> None:
         writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
         writer.writeheader()
         writer.writerows(rows)
 
+    return _stage(path, False, write)
+
+
+def _arrow_table(rows: list[dict[str, Any]]) -> Any:
+    # Every column is a string, as in the CSVs; keys missing from a row become nulls.
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    return pa.table(
+        {c: pa.array([None if r.get(c) is None else str(r.get(c)) for r in rows], pa.string()) for c in columns}
+    )
+
+
+def _stage_arrow(path: str, rows: list[dict[str, Any]]) -> str:
+    def write(f: Any) -> None:
+        data = _arrow_table(rows)
+        with pa.ipc.new_file(f, data.schema) as writer:
+            writer.write_table(data)
+
+    return _stage(path, True, write)
+
+
+def _file_stamp(path: str) -> tuple[int, int, int] | None:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    # os.replace swaps the inode, so same-size rewrites within one mtime tick still differ.
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _copy_rows(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Callers mutate rows in place before writing back, so never hand out cached dicts.
+    return [dict(r) for r in rows]
+
+
+class ConflictError(RuntimeError):
+    def __init__(self, table: str, key: str | None) -> None:
+        super().__init__(f"{table} row {key} was changed by another writer.")
+        self.table = table
+        self.key = key
+
+
+def _row_version(row: dict[str, Any]) -> str:
+    # Content fingerprint; stands in for a version counter without adding a column.
+    return hashlib.blake2b(json.dumps(row, sort_keys=True, default=str).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _row_versions(table: str, rows: list[dict[str, Any]]) -> dict[str, str] | None:
+    field = TABLE_KEY_FIELDS[table]
+    versions = {r.get(field): _row_version(r) for r in rows}
+    # Duplicate ids cannot be told apart, so such tables fall back to last-writer-wins.
+    return versions if len(versions) == len(rows) else None
+
+
+class RowSet(list):
+    # Rows as handed out by DataStore, with each row's version at read time
+    # so update_* can compare-and-swap just the rows the caller changed.
+    def __init__(self, rows: list[dict[str, Any]] = (), versions: dict[str, str] | None = None) -> None:
+        super().__init__(rows)
+        self.versions = versions
+
+
+@dataclass
+class ChangeEvent:
+    table: str
+    # None means the whole table was replaced and listeners should resync.
+    key: str | None
+    old: dict[str, Any] | None
+    new: dict[str, Any] | None
+
+
+def _diff_rows(
+    table: str, old_rows: list[dict[str, Any]], new_rows: list[dict[str, Any]]
+) -> list[ChangeEvent] | None:
+    field = TABLE_KEY_FIELDS[table]
+    old_map = {r.get(field): r for r in old_rows}
+    new_map = {r.get(field): r for r in new_rows}
+    if len(old_map) != len(old_rows) or len(new_map) != len(new_rows):
+        return None
+    # A reorder of surviving rows is not expressible as row events.
+    if [k for k in old_map if k in new_map] != [k for k in new_map if k in old_map]:
+        return None
+    events = []
+    for key, row in new_map.items():
+        prev = old_map.get(key)
+        if prev != row:
+            events.append(ChangeEvent(table, key, prev, dict(row)))
+    for key, prev in old_map.items():
+        if key not in new_map:
+            events.append(ChangeEvent(table, key, prev, None))
+    return events
+
+
+def _apply_ops(
+    table: str, rows: list[dict[str, Any]], ops: list[tuple[str, str, dict[str, Any] | None]]
+) -> list[dict[str, Any]]:
+    # Upserts replace the keyed row in place or append it; deletes drop it.
+    field = TABLE_KEY_FIELDS[table]
+    positions = {r.get(field): i for i, r in enumerate(rows)}
+    for op, key, row in ops:
+        position = positions.get(key)
+        if op == "upsert":
+            if position is None:
+                positions[key] = len(rows)
+                rows.append(dict(row))
+            else:
+                rows[position] = dict(row)
+        elif position is not None:
+            rows.pop(position)
+            positions = {r.get(field): i for i, r in enumerate(rows)}
+    return rows
+
+
+class _Journal:
+    # Append-only JSONL of row-level upserts/deletes. Each write is one
+    # transaction closed by a commit marker; a torn or uncommitted tail is
+    # ignored on replay.
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.records = 0
+        self._next_txn = 1
+        self._ops = self._replay()
+        self._ops_stamp = self.stamp()
+
+    def stamp(self) -> tuple[int, int, int] | None:
+        return _file_stamp(self.path)
+
+    def ops(self, table: str) -> list[tuple[str, str, dict[str, Any] | None]]:
+        stamp = self.stamp()
+        if stamp != self._ops_stamp:
+            self._ops = self._replay()
+            self._ops_stamp = stamp
+        return self._ops.get(table, [])
+
+    def _replay(self) -> dict[str, list[tuple[str, str, dict[str, Any] | None]]]:
+        committed: dict[str, list[tuple[str, str, dict[str, Any] | None]]] = {}
+        pending: dict[int, list[dict[str, Any]]] = {}
+        self.records = 0
+        if not os.path.exists(self.path):
+            return committed
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash; later appends start on a fresh line.
+                    continue
+                txn = entry.get("txn", 0)
+                self._next_txn = max(self._next_txn, txn + 1)
+                if entry.get("op") == "commit":
+                    for op in pending.pop(txn, []):
+                        committed.setdefault(op["table"], []).append((op["op"], op["key"], op.get("row")))
+                        self.records += 1
+                else:
+                    pending.setdefault(txn, []).append(entry)
+        return committed
+
+    def append(self, ops: list[tuple[str, str, str, dict[str, Any] | None]]) -> None:
+        txn = self._next_txn
+        self._next_txn += 1
+        lines = [
+            json.dumps({"txn": txn, "table": table, "op": op, "key": key, "row": row}, separators=(",", ":"))
+            for table, op, key, row in ops
+        ]
+        lines.append(json.dumps({"txn": txn, "op": "commit"}, separators=(",", ":")))
+        payload = ("\n".join(lines) + "\n").encode("utf-8")
+        fresh = self._ops_stamp == self.stamp()
+        with open(self.path, "ab+") as f:
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    payload = b"\n" + payload
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        if fresh:
+            for table, op, key, row in ops:
+                self._ops.setdefault(table, []).append((op, key, row))
+            self._ops_stamp = self.stamp()
+        self.records += len(ops)
+
+    def truncate(self) -> None:
+        with open(self.path, "w", encoding="utf-8"):
+            pass
+        self._ops = {}
+        self._ops_stamp = self.stamp()
+        self.records = 0
+
+
+@dataclass
+class _CachedTable:
+    rows: list[dict[str, Any]]
+    # File stamp, or (csv stamp, journal stamp) when the journal is on.
+    stamp: tuple | None
+    loaded_at: float
+    versions: dict[str, str] | None = None
+    versioned: bool = False
+
+    def row_set(self, table: str) -> RowSet:
+        if not self.versioned:
+            self.versions = _row_versions(table, self.rows)
+            self.versioned = True
+        return RowSet(_copy_rows(self.rows), dict(self.versions) if self.versions is not None else None)
+
+
+class SQLiteStore:
+    # One SQL row per record: indexed lookup columns (normalised status and
+    # location, assignment, mission dates) next to the full row as JSON, so
+    # rows round-trip with their original columns and order.
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (tbl TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+        for table in TABLE_KEY_FIELDS:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "pos INTEGER NOT NULL, id TEXT, status TEXT, location TEXT, current_assignment TEXT, "
+                "start_date TEXT, end_date TEXT, data TEXT NOT NULL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_id ON {table} (id)")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_pos ON {table} (pos)")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_status_location ON {table} (status, location)")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_location ON {table} (location)")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_assignment ON {table} (current_assignment)")
+            self._conn.execute("INSERT OR IGNORE INTO meta (tbl, version) VALUES (?, 0)", (table,))
+        self._conn.execute("CREATE INDEX IF NOT EXISTS missions_dates ON missions (start_date, end_date)")
+
+    def version(self, table: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT version FROM meta WHERE tbl = ?", (table,)).fetchone()[0]
+
+    def count(self, table: str) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def read(self, table: str) -> list[dict[str, Any]]:
+        with self._lock:
+            return [json.loads(data) for (data,) in self._conn.execute(f"SELECT data FROM {table} ORDER BY pos")]
+
+    def query(self, table: str, status: str | None = None, location: str | None = None) -> list[dict[str, Any]]:
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if location is not None:
+            clauses.append("location = ?")
+            params.append(location)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            cursor = self._conn.execute(f"SELECT data FROM {table}{where} ORDER BY pos", params)
+            return [json.loads(data) for (data,) in cursor]
+
+    def write(self, changes: dict[str, tuple[Iterable[dict[str, Any]], list[ChangeEvent] | None]]) -> None:
+        # Row events become targeted UPDATE/INSERT/DELETEs; None rewrites the
+        # table from the rows, which may be a lazy iterator. All tables commit
+        # in one transaction.
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for table, (rows, events) in changes.items():
+                    if events is None:
+                        self._conn.execute(f"DELETE FROM {table}")
+                        self._conn.executemany(
+                            f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            ((pos, *self._columns(table, row)) for pos, row in enumerate(rows)),
+                        )
+                    for event in events or []:
+                        if event.new is None:
+                            self._conn.execute(f"DELETE FROM {table} WHERE id = ?", (event.key,))
+                        elif event.old is None:
+                            self._conn.execute(
+                                f"INSERT INTO {table} VALUES ((SELECT COALESCE(MAX(pos), -1) + 1 FROM {table}), ?, ?, ?, ?, ?, ?, ?)",
+                                self._columns(table, event.new),
+                            )
+                        else:
+                            self._conn.execute(
+                                f"UPDATE {table} SET id = ?, status = ?, location = ?, current_assignment = ?, "
+                                "start_date = ?, end_date = ?, data = ? WHERE id = ?",
+                                (*self._columns(table, event.new), event.key),
+                            )
+                    self._conn.execute("UPDATE meta SET version = version + 1 WHERE tbl = ?", (table,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _columns(table: str, row: dict[str, Any]) -> tuple:
+        return (
+            row.get(TABLE_KEY_FIELDS[table]),
+            normalize_text(str(row.get("status", ""))),
+            normalize_text(str(row.get("location", ""))),
+            row.get("current_assignment"),
+            row.get("start_date"),
+            row.get("end_date"),
+            json.dumps(row),
+        )
+
+
+def import_csvs(sqlite_path: str, csv_paths: dict[str, str]) -> dict[str, int]:
+    # One-shot import of the CSV tables into a SQLite database, replacing
+    # whatever those tables held. Returns the row count per table.
+    # Rows are streamed from the CSVs, so no table is held in memory whole.
+    db = SQLiteStore(sqlite_path)
+    paths = {table: path for table, path in csv_paths.items() if os.path.exists(path)}
+    db.write({table: (iter_csv(path), None) for table, path in paths.items()})
+    return {table: db.count(table) for table in paths}
+
+
+class ArrowStore:
+    # One Arrow IPC file per table. Reads memory-map the file instead of
+    # parsing text, and status/location filters run as compute kernels over
+    # the mapped columns before any row dicts are built.
+    def __init__(self, directory: str) -> None:
+        if pa is None:
+            raise RuntimeError("pyarrow is not installed.")
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, table: str) -> str:
+        return os.path.join(self.directory, f"{table}.arrow")
+
+    def stamp(self, table: str) -> tuple[int, int, int] | None:
+        return _file_stamp(self.path(table))
+
+    def _open(self, table: str) -> Any:
+        # The mapping outlives the handle for as long as the table's buffers do.
+        with pa.memory_map(self.path(table), "r") as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def read(self, table: str) -> list[dict[str, Any]]:
+        return self._open(table).to_pylist()
+
+    def query(self, table: str, status: str | None = None, location: str | None = None) -> list[dict[str, Any]]:
+        data = self._open(table)
+        mask = None
+        for column, value in (("status", status), ("location", location)):
+            if value is None:
+                continue
+            if column not in data.column_names:
+                return []
+            match = pc.equal(pc.utf8_lower(pc.utf8_trim_whitespace(data[column])), value)
+            mask = match if mask is None else pc.and_(mask, match)
+        if mask is not None:
+            data = data.filter(mask)
+        return data.to_pylist()
+
+    def write(self, tables: dict[str, list[dict[str, Any]]]) -> None:
+        # Staged and fsynced first, then swapped in back to back.
+        staged = [(self.path(table), _stage_arrow(self.path(table), rows)) for table, rows in tables.items()]
+        for path, tmp in staged:
+            os.replace(tmp, path)
+
+
+def convert_csvs(arrow_dir: str, csv_paths: dict[str, str]) -> dict[str, int]:
+    # One-shot conversion of the CSV tables into Arrow snapshots, replacing
+    # any existing ones. Returns the row count per table.
+    store = ArrowStore(arrow_dir)
+    rows = {table: _parse_csv(path) for table, path in csv_paths.items() if os.path.exists(path)}
+    store.write(rows)
+    return {table: len(table_rows) for table, table_rows in rows.items()}
+
 
 @dataclass
 class SheetConfig:
@@ -31,8 +467,12 @@ class SheetConfig:
     tab_name: str
 
 
+def _cell(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
 class GoogleSheetClient:
-    def __init__(self, service_account_json: str) -> None:
+    def __init__(self, service_account_json: str, ttl: float = 30.0) -> None:
         if gspread is None or Credentials is None:
             raise RuntimeError("Google Sheets dependencies not installed.")
         scopes = [
@@ -41,19 +481,221 @@ class GoogleSheetClient:
         ]
         creds = Credentials.from_service_account_file(service_account_json, scopes=scopes)
         self.client = gspread.authorize(creds)
+        self.ttl = ttl
+        # Opened worksheet handles, and the last grid read or written per tab
+        # (as cell strings) so writes can be diffed instead of re-uploaded.
+        self._worksheets: dict[tuple[str, str], Any] = {}
+        self._lock = threading.RLock()
+        self._grids: dict[tuple[str, str], tuple[float, list[dict[str, Any]], list[list[str]]]] = {}
+
+    def _worksheet(self, cfg: SheetConfig) -> Any:
+        key = (cfg.sheet_id, cfg.tab_name)
+        if key not in self._worksheets:
+            self._worksheets[key] = self.client.open_by_key(cfg.sheet_id).worksheet(cfg.tab_name)
+        return self._worksheets[key]
+
+    @staticmethod
+    def _grid(rows: list[dict[str, Any]]) -> list[list[str]]:
+        if not rows:
+            return []
+        headers = list(rows[0].keys())
+        return [headers] + [[_cell(row.get(h, "")) for h in headers] for row in rows]
 
     def read(self, cfg: SheetConfig) -> list[dict[str, Any]]:
-        ws = self.client.open_by_key(cfg.sheet_id).worksheet(cfg.tab_name)
-        return ws.get_all_records()
+        with self._lock:
+            return self._read(cfg)
+
+    def _read(self, cfg: SheetConfig) -> list[dict[str, Any]]:
+        key = (cfg.sheet_id, cfg.tab_name)
+        cached = self._grids.get(key)
+        if cached is not None and time.monotonic() - cached[0] <= self.ttl:
+            return [dict(r) for r in cached[1]]
+        rows = self._worksheet(cfg).get_all_records()
+        self._grids[key] = (time.monotonic(), [dict(r) for r in rows], self._grid(rows))
+        return rows
 
     def write(self, cfg: SheetConfig, rows: list[dict[str, Any]]) -> None:
+        with self._lock:
+            self._write(cfg, rows)
+
+    def poll(self, cfg: SheetConfig) -> tuple[list[dict[str, Any]] | None, list[dict[str, Any]]]:
+        # Fresh read that also returns the rows this client last read or
+        # wrote, so callers can tell sheet-side edits from their own writes.
+        with self._lock:
+            key = (cfg.sheet_id, cfg.tab_name)
+            known = self._grids.get(key)
+            rows = self._worksheet(cfg).get_all_records()
+            self._grids[key] = (time.monotonic(), [dict(r) for r in rows], self._grid(rows))
+            return (known[1] if known is not None else None), rows
+
+    def _write(self, cfg: SheetConfig, rows: list[dict[str, Any]]) -> None:
         if not rows:
             return
-        ws = self.client.open_by_key(cfg.sheet_id).worksheet(cfg.tab_name)
-        headers = list(rows[0].keys())
-        values = [headers] + [[row.get(h, "") for h in headers] for row in rows]
-        ws.clear()
-        ws.update(values)
+        key = (cfg.sheet_id, cfg.tab_name)
+        ws = self._worksheet(cfg)
+        grid = self._grid(rows)
+        if key not in self._grids:
+            self._read(cfg)
+        old = self._grids[key][2]
+        if not old or old[0] != grid[0]:
+            # Header changes shift every column; rewrite the tab.
+            ws.clear()
+            ws.update(grid)
+        else:
+            width = len(grid[0])
+            updates = []
+            for r in range(1, max(len(grid), len(old))):
+                new_row = grid[r] if r < len(grid) else [""] * width
+                old_row = old[r] if r < len(old) else [""] * width
+                c = 0
+                while c < width:
+                    if new_row[c] == (old_row[c] if c < len(old_row) else ""):
+                        c += 1
+                        continue
+                    start = c
+                    while c < width and new_row[c] != (old_row[c] if c < len(old_row) else ""):
+                        c += 1
+                    first = gspread.utils.rowcol_to_a1(r + 1, start + 1)
+                    last = gspread.utils.rowcol_to_a1(r + 1, c)
+                    updates.append({"range": f"{first}:{last}", "values": [new_row[start:c]]})
+            # One API call covering only the runs of changed cells.
+            if updates:
+                ws.batch_update(updates)
+        self._grids[key] = (time.monotonic(), [dict(r) for r in rows], grid)
+
+
+class SheetSyncWorker:
+    # Pushes local table snapshots to Sheets off the request path. Writers
+    # only mark a tab dirty; marks that arrive before the worker gets to a tab
+    # coalesce, and each flush writes that tab's latest snapshot once.
+    def __init__(
+        self,
+        client: GoogleSheetClient,
+        snapshot: Callable[[str], list[dict[str, Any]]],
+        delay: float = 0.5,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self.client = client
+        self.snapshot = snapshot
+        self.delay = delay
+        self.max_backoff = max_backoff
+        self._cond = threading.Condition()
+        self._dirty: dict[str, tuple[SheetConfig, float]] = {}
+        self._inflight: dict[str, tuple[SheetConfig, float]] = {}
+        self._thread: threading.Thread | None = None
+        self._stopped = False
+        self.pushed = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.last_error: str | None = None
+
+    def mark(self, table: str, cfg: SheetConfig) -> None:
+        with self._cond:
+            if table in self._dirty:
+                self.coalesced += 1
+            else:
+                self._dirty[table] = (cfg, time.monotonic())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sheet-sync", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            pending = list(self._dirty.values()) + list(self._inflight.values())
+            oldest = min((marked for _, marked in pending), default=None)
+            return {
+                "queue_depth": len(self._dirty.keys() | self._inflight.keys()),
+                "lag_s": round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+                "pushed": self.pushed,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+                "last_error": self.last_error,
+            }
+
+    def flush(self, timeout: float | None = None) -> bool:
+        # Waits until every marked tab has been pushed; False on timeout.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._dirty or self._inflight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        attempt = 0
+        while True:
+            with self._cond:
+                while not self._dirty and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+            # Let a burst of writes land before pushing.
+            time.sleep(self.delay if attempt == 0 else min(self.max_backoff, self.delay * 2**attempt))
+            with self._cond:
+                self._inflight, self._dirty = self._dirty, {}
+            failed = {}
+            for table, (cfg, marked) in self._inflight.items():
+                try:
+                    self.client.write(cfg, self.snapshot(table))
+                    self.pushed += 1
+                except Exception as exc:
+                    failed[table] = (cfg, marked)
+                    self.failures += 1
+                    self.last_error = f"{table}: {exc}"
+            with self._cond:
+                for table, (cfg, marked) in failed.items():
+                    # Keep the original mark time so lag keeps growing.
+                    cfg_now, _ = self._dirty.get(table, (cfg, marked))
+                    self._dirty[table] = (cfg_now, marked)
+                self._inflight = {}
+                self._cond.notify_all()
+            attempt = attempt + 1 if failed else 0
+
+
+class SheetPoller:
+    # Runs DataStore.poll_sheets every `interval` seconds on a daemon thread.
+    def __init__(self, poll: Callable[[], list[ChangeEvent]], interval: float) -> None:
+        self.poll = poll
+        self.interval = interval
+        self.polls = 0
+        self.changes = 0
+        self.errors = 0
+        self.last_error: str | None = None
+        self.last_poll: float | None = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sheet-poll", daemon=True)
+        self._thread.start()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "interval_s": self.interval,
+            "polls": self.polls,
+            "changes": self.changes,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "since_last_poll_s": round(time.monotonic() - self.last_poll, 3) if self.last_poll else None,
+        }
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.changes += len(self.poll())
+            except Exception as exc:
+                self.errors += 1
+                self.last_error = str(exc)
+            self.polls += 1
+            self.last_poll = time.monotonic()
 
 
 class DataStore:
@@ -68,9 +710,366 @@ class DataStore:
         self._drone_sheet_id = os.getenv("DRONE_SHEET_ID")
         self._drone_sheet_tab = os.getenv("DRONE_SHEET_TAB")
 
+        self._sheet_ttl = float(os.getenv("SHEET_CACHE_TTL", "30"))
+        self.backend = os.getenv("DATA_BACKEND", "csv").lower()
+        self._sqlite = SQLiteStore(os.getenv("SQLITE_PATH", "drone_ops.db")) if self.backend == "sqlite" else None
+        self._arrow = ArrowStore(os.getenv("ARROW_DIR", "arrow")) if self.backend == "arrow" else None
+        journal_path = os.getenv("DATA_JOURNAL")
+        self._journal = _Journal(journal_path) if journal_path and self.backend == "csv" else None
+        self._compact_every = int(os.getenv("DATA_JOURNAL_COMPACT_EVERY", "500"))
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_file: Any = None
+        self._lock_path = os.getenv("DATA_LOCK_FILE", ".datastore.lock")
+        self._cache: dict[str, _CachedTable] = {}
+        self._generation = 0
+        self._listeners: list[Callable[[ChangeEvent], None]] = []
+
         self._gs_client = None
         if self._gs_json and self._pilot_sheet_id and self._pilot_sheet_tab:
-            self._gs_client = GoogleSheetClient(self._gs_json)
+            self._gs_client = GoogleSheetClient(self._gs_json, ttl=self._sheet_ttl)
+
+        # In background mode the local tables serve reads and Sheets is
+        # updated asynchronously; otherwise Sheets is read and written inline.
+        self._sheet_sync: SheetSyncWorker | None = None
+        self._sheet_seeded: set[str] = set()
+        if self._gs_client and os.getenv("SHEET_SYNC", "inline").lower() == "background":
+            self._sheet_sync = SheetSyncWorker(
+                self._gs_client,
+                lambda table: self._load_local(table, self._csv_tables()[table]),
+                delay=float(os.getenv("SHEET_SYNC_DELAY", "0.5")),
+                max_backoff=float(os.getenv("SHEET_SYNC_MAX_BACKOFF", "60")),
+            )
+        self._sheet_poller: SheetPoller | None = None
+        poll_interval = float(os.getenv("SHEET_POLL_INTERVAL", "0"))
+        if self._gs_client and poll_interval > 0:
+            self._sheet_poller = SheetPoller(self.poll_sheets, poll_interval)
+
+    @property
+    def generation(self) -> int:
+        # Bumped whenever any cached table is reloaded or written.
+        return self._generation
+
+    def subscribe(self, listener: Callable[[ChangeEvent], None]) -> None:
+        self._listeners.append(listener)
+
+    def _publish(
+        self, table: str, old_rows: list[dict[str, Any]] | None, new_rows: list[dict[str, Any]]
+    ) -> None:
+        if not self._listeners:
+            return
+        events = _diff_rows(table, old_rows, new_rows) if old_rows is not None else None
+        if events is None:
+            events = [ChangeEvent(table, None, None, None)]
+        for event in events:
+            for listener in self._listeners:
+                listener(event)
+
+    def _remember(
+        self,
+        table: str,
+        key: str,
+        rows: list[dict[str, Any]],
+        stamp: tuple | None,
+        publish: bool = True,
+    ) -> _CachedTable:
+        previous = self._cache.get(key)
+        self._cache[key] = cached = _CachedTable(rows, stamp, time.monotonic())
+        self._generation += 1
+        if publish:
+            self._publish(table, previous.rows if previous else None, rows)
+        return cached
+
+    def _csv_stamp(self, path: str) -> tuple | None:
+        stamp = _file_stamp(path)
+        if self._journal is None:
+            return stamp
+        return (stamp, self._journal.stamp())
+
+    def _cached_csv(self, table: str, path: str) -> _CachedTable:
+        stamp = self._csv_stamp(path)
+        cached = self._cache.get(path)
+        if cached is None or cached.stamp != stamp:
+            rows = _parse_csv(path)
+            if self._journal is not None:
+                rows = _apply_ops(table, rows, self._journal.ops(table))
+            cached = self._remember(table, path, rows, stamp)
+        return cached
+
+    def _cached_sqlite(self, table: str, path: str) -> _CachedTable:
+        key = f"sqlite:{table}"
+        if key not in self._cache and self._sqlite.count(table) == 0 and os.path.exists(path):
+            # First use of an empty database table seeds it from the CSV.
+            with self._exclusive():
+                if self._sqlite.count(table) == 0:
+                    self._sqlite.write({table: (iter_csv(path), None)})
+        stamp = self._sqlite.version(table)
+        cached = self._cache.get(key)
+        if cached is None or cached.stamp != stamp:
+            cached = self._remember(table, key, self._sqlite.read(table), stamp)
+        return cached
+
+    def _cached_arrow(self, table: str, path: str) -> _CachedTable:
+        key = f"arrow:{table}"
+        if self._arrow.stamp(table) is None and os.path.exists(path):
+            # First use of a missing snapshot converts it from the CSV.
+            with self._exclusive():
+                if self._arrow.stamp(table) is None:
+                    self._arrow.write({table: _parse_csv(path)})
+        stamp = self._arrow.stamp(table)
+        cached = self._cache.get(key)
+        if cached is None or cached.stamp != stamp:
+            cached = self._remember(table, key, self._arrow.read(table), stamp)
+        return cached
+
+    def _load_local(self, table: str, path: str) -> RowSet:
+        pending = getattr(self._local, "batch", None)
+        if pending and table in pending:
+            rows = pending[table][1]
+            return RowSet(_copy_rows(rows), _row_versions(table, rows))
+        if self._sqlite is not None:
+            return self._cached_sqlite(table, path).row_set(table)
+        if self._arrow is not None:
+            return self._cached_arrow(table, path).row_set(table)
+        return self._cached_csv(table, path).row_set(table)
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        # Serialises writers across threads (RLock) and processes (flock on
+        # DATA_LOCK_FILE, where fcntl exists). Re-entrant within a thread.
+        with self._write_lock:
+            self._lock_depth += 1
+            try:
+                if self._lock_depth == 1 and fcntl is not None:
+                    self._lock_file = open(self._lock_path, "a+")
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_file is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def _merge(self, table: str, rows: list[dict[str, Any]], current: RowSet) -> list[dict[str, Any]]:
+        # Compare-and-swap: every row the caller changed or dropped since its
+        # read must still be at the version it saw. Rows it left alone are taken
+        # from the latest snapshot, so concurrent writers to other rows survive.
+        # Plain lists keep the old replace-the-table behaviour.
+        base = getattr(rows, "versions", None)
+        if base is None or current.versions is None or _row_versions(table, rows) is None:
+            return rows
+        field = TABLE_KEY_FIELDS[table]
+        changed = {r.get(field): r for r in rows if _row_version(r) != base.get(r.get(field))}
+        dropped = set(base) - {r.get(field) for r in rows}
+        for key in list(changed) + list(dropped):
+            if current.versions.get(key) != base.get(key):
+                raise ConflictError(table, key)
+        latest = {r.get(field): r for r in current}
+        merged = [changed.get(r.get(field)) or latest.get(r.get(field)) for r in rows]
+        merged = [r for r in merged if r is not None]
+        merged.extend(r for key, r in latest.items() if key not in base and key not in changed)
+        # The caller has now seen its own writes.
+        for key, row in changed.items():
+            base[key] = _row_version(row)
+        for key in dropped:
+            base.pop(key, None)
+        return merged
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        # Holds this thread's CSV table writes and persists them together on
+        # exit: one journal transaction, or fsynced temp files swapped in back
+        # to back. Nothing is written if the block raises.
+        if getattr(self._local, "batch", None) is not None:
+            yield
+            return
+        with self._exclusive():
+            self._local.batch = {}
+            try:
+                yield
+                pending = self._local.batch
+            finally:
+                self._local.batch = None
+            if pending:
+                self._write_tables(pending)
+
+    def _load_sheet(self, table: str, cfg: SheetConfig) -> RowSet:
+        key = f"sheet:{cfg.sheet_id}:{cfg.tab_name}"
+        cached = self._cache.get(key)
+        # A running poller keeps the snapshot fresh, so reads never wait on the TTL.
+        if cached is None or (self._sheet_poller is None and time.monotonic() - cached.loaded_at > self._sheet_ttl):
+            cached = self._remember(table, key, self._gs_client.read(cfg), None)
+        return cached.row_set(table)
+
+    def _save_local(self, table: str, path: str, rows: list[dict[str, Any]], publish: bool = True) -> None:
+        if not rows:
+            return
+        pending = getattr(self._local, "batch", None)
+        if pending is not None:
+            pending[table] = (path, _copy_rows(rows), publish)
+            return
+        self._write_tables({table: (path, rows, publish)})
+
+    def _csv_tables(self) -> dict[str, str]:
+        return {"pilots": self._pilot_csv, "drones": self._drone_csv, "missions": self._mission_csv}
+
+    def _write_tables(self, writes: dict[str, tuple[str, list[dict[str, Any]], bool]]) -> None:
+        self._persist_tables(writes)
+        if self._sheet_sync is not None:
+            for table in writes:
+                cfg = self._sheet_cfg(table)
+                if cfg is not None:
+                    self._sheet_sync.mark(table, cfg)
+
+    def _persist_tables(self, writes: dict[str, tuple[str, list[dict[str, Any]], bool]]) -> None:
+        if self._sqlite is not None:
+            self._sqlite_tables(writes)
+            return
+        if self._arrow is not None:
+            self._arrow.write({table: rows for table, (_, rows, _) in writes.items()})
+            for table, (path, rows, publish) in writes.items():
+                self._remember(table, f"arrow:{table}", _copy_rows(rows), self._arrow.stamp(table), publish)
+            return
+        if self._journal is not None:
+            self._journal_tables(writes)
+            return
+        staged = [(table, path, rows, publish, _stage_csv(path, rows)) for table, (path, rows, publish) in writes.items()]
+        for table, path, rows, publish, tmp in staged:
+            os.replace(tmp, path)
+            self._remember(table, path, _copy_rows(rows), _file_stamp(path), publish)
+
+    def _sqlite_tables(self, writes: dict[str, tuple[str, list[dict[str, Any]], bool]]) -> None:
+        changes = {
+            table: (rows, _diff_rows(table, self._cached_sqlite(table, path).rows, rows))
+            for table, (path, rows, _) in writes.items()
+        }
+        self._sqlite.write(changes)
+        for table, (path, rows, publish) in writes.items():
+            self._remember(table, f"sqlite:{table}", _copy_rows(rows), self._sqlite.version(table), publish)
+
+    def _journal_tables(self, writes: dict[str, tuple[str, list[dict[str, Any]], bool]]) -> None:
+        # Only the rows that differ from the current snapshots hit the disk.
+        ops = []
+        for table, (path, rows, _) in writes.items():
+            events = _diff_rows(table, self._cached_csv(table, path).rows, rows)
+            if events is None:
+                self.compact({name: rows for name, (_, rows, _) in writes.items()})
+                return
+            ops.extend((table, "upsert" if e.new is not None else "delete", e.key, e.new) for e in events)
+        if ops:
+            before = self._journal.stamp()
+            self._journal.append(ops)
+            after = self._journal.stamp()
+            # The append only touched the written tables; keep the other snapshots warm.
+            for key, cached in self._cache.items():
+                if key in self._csv_tables().values() and cached.stamp and cached.stamp[1] == before:
+                    cached.stamp = (cached.stamp[0], after)
+            for table, (path, rows, publish) in writes.items():
+                self._remember(table, path, _copy_rows(rows), self._csv_stamp(path), publish)
+        if self._journal.records >= self._compact_every:
+            self.compact()
+
+    def compact(self, replace: dict[str, list[dict[str, Any]]] | None = None) -> None:
+        # Folds the journal into the CSV snapshots and empties it. Replay is
+        # idempotent, so a crash between the two steps loses nothing.
+        if self._journal is None:
+            return
+        with self._exclusive():
+            self._compact(replace)
+
+    def _compact(self, replace: dict[str, list[dict[str, Any]]] | None) -> None:
+        replace = replace or {}
+        current = {
+            table: replace[table] if table in replace else self._cached_csv(table, path).rows
+            for table, path in self._csv_tables().items()
+        }
+        staged = [(path, _stage_csv(path, current[table])) for table, path in self._csv_tables().items() if current[table]]
+        for path, tmp in staged:
+            os.replace(tmp, path)
+        self._journal.truncate()
+        for table, path in self._csv_tables().items():
+            if current[table]:
+                self._remember(table, path, _copy_rows(current[table]), self._csv_stamp(path), table in replace)
+
+    def _save_sheet(self, table: str, cfg: SheetConfig, rows: list[dict[str, Any]]) -> None:
+        self._gs_client.write(cfg, rows)
+        if rows:
+            self._remember(table, f"sheet:{cfg.sheet_id}:{cfg.tab_name}", _copy_rows(rows), None)
+
+    def _sheet_cfg(self, table: str) -> SheetConfig | None:
+        if not self._gs_client:
+            return None
+        if table == "pilots":
+            return self._pilot_cfg()
+        if table == "drones":
+            return self._drone_cfg()
+        return None
+
+    def _reads_sheet(self, table: str) -> bool:
+        return self._sheet_sync is None and self._sheet_cfg(table) is not None
+
+    def _load_synced(self, table: str) -> RowSet:
+        # Background mode: pull the sheet once into the local table, then
+        # serve every read locally.
+        path = self._csv_tables()[table]
+        if table not in self._sheet_seeded:
+            with self._exclusive():
+                if table not in self._sheet_seeded:
+                    try:
+                        rows = self._gs_client.read(self._sheet_cfg(table))
+                    except Exception:
+                        rows = []
+                    if rows:
+                        self._save_local(table, path, rows)
+                    self._sheet_seeded.add(table)
+        return self._load_local(table, path)
+
+    def poll_sheets(self) -> list[ChangeEvent]:
+        # One change-feed pass: fetch each Sheets tab, diff it by id against
+        # what this process last saw there, and apply only the edited rows to
+        # the snapshot that serves reads. Listeners get row-level events.
+        events: list[ChangeEvent] = []
+        for table in ("pilots", "drones"):
+            cfg = self._sheet_cfg(table)
+            if cfg is None:
+                continue
+            known, rows = self._gs_client.poll(cfg)
+            with self._exclusive():
+                if self._reads_sheet(table):
+                    key = f"sheet:{cfg.sheet_id}:{cfg.tab_name}"
+                    previous = self._cache.get(key)
+                    delta = _diff_rows(table, previous.rows, rows) if previous else None
+                    if delta == []:
+                        previous.loaded_at = time.monotonic()
+                        continue
+                    self._remember(table, key, rows, None)
+                    events.extend(delta or [ChangeEvent(table, None, None, None)])
+                    continue
+                if table not in self._sheet_seeded:
+                    continue
+                delta = _diff_rows(table, known, rows) if known is not None else None
+                if not delta:
+                    continue
+                path = self._csv_tables()[table]
+                current = self._load_local(table, path)
+                merged = _apply_ops(
+                    table, list(current), [("upsert" if e.new is not None else "delete", e.key, e.new) for e in delta]
+                )
+                if merged != current:
+                    self._save_local(table, path, merged)
+                events.extend(delta)
+        return events
+
+    def sheet_poll_stats(self) -> dict[str, Any] | None:
+        return self._sheet_poller.stats() if self._sheet_poller is not None else None
+
+    def sheet_sync_stats(self) -> dict[str, Any] | None:
+        return self._sheet_sync.stats() if self._sheet_sync is not None else None
+
+    def flush_sheet_sync(self, timeout: float | None = None) -> bool:
+        return self._sheet_sync.flush(timeout) if self._sheet_sync is not None else True
 
     def _pilot_cfg(self) -> SheetConfig | None:
         if self._pilot_sheet_id and self._pilot_sheet_tab:
@@ -82,28 +1081,128 @@ class DataStore:
             return SheetConfig(self._drone_sheet_id, self._drone_sheet_tab)
         return None
 
-    def get_pilots(self) -> list[dict[str, Any]]:
-        if self._gs_client and self._pilot_cfg():
-            return self._gs_client.read(self._pilot_cfg())
-        return _parse_csv(self._pilot_csv)
+    def scan(self, table: str) -> Iterator[dict[str, Any]]:
+        # Yields a table's rows one at a time for one-off passes. A plain CSV
+        # table with no current cached snapshot is streamed straight from the
+        # file and is not cached, so scanning a large export keeps memory flat.
+        path = self._csv_tables()[table]
+        cached = self._cache.get(path)
+        if (
+            self.backend == "csv"
+            and self._journal is None
+            and self._sheet_cfg(table) is None
+            and not getattr(self._local, "batch", None)
+            and (cached is None or cached.stamp != self._csv_stamp(path))
+        ):
+            yield from iter_csv(path)
+            return
+        loaders = {"pilots": self.get_pilots, "drones": self.get_drones, "missions": self.get_missions}
+        yield from loaders[table]()
+
+    def get_pilots(self) -> RowSet:
+        if self._reads_sheet("pilots"):
+            return self._load_sheet("pilots", self._pilot_cfg())
+        if self._sheet_cfg("pilots") is not None:
+            return self._load_synced("pilots")
+        return self._load_local("pilots", self._pilot_csv)
 
-    def get_drones(self) -> list[dict[str, Any]]:
-        if self._gs_client and self._drone_cfg():
-            return self._gs_client.read(self._drone_cfg())
-        return _parse_csv(self._drone_csv)
+    def get_drones(self) -> RowSet:
+        if self._reads_sheet("drones"):
+            return self._load_sheet("drones", self._drone_cfg())
+        if self._sheet_cfg("drones") is not None:
+            return self._load_synced("drones")
+        return self._load_local("drones", self._drone_csv)
 
-    def get_missions(self) -> list[dict[str, Any]]:
-        return _parse_csv(self._mission_csv)
+    def get_missions(self) -> RowSet:
+        return self._load_local("missions", self._mission_csv)
 
     def update_pilots(self, pilots: list[dict[str, Any]]) -> None:
-        if self._gs_client and self._pilot_cfg():
-            self._gs_client.write(self._pilot_cfg(), pilots)
-        _write_csv(self._pilot_csv, pilots)
+        with self._exclusive():
+            pilots = self._merge("pilots", pilots, self.get_pilots())
+            on_sheets = self._reads_sheet("pilots")
+            if on_sheets:
+                self._save_sheet("pilots", self._pilot_cfg(), pilots)
+            self._save_local("pilots", self._pilot_csv, pilots, publish=not on_sheets)
 
     def update_drones(self, drones: list[dict[str, Any]]) -> None:
-        if self._gs_client and self._drone_cfg():
-            self._gs_client.write(self._drone_cfg(), drones)
-        _write_csv(self._drone_csv, drones)
+        with self._exclusive():
+            drones = self._merge("drones", drones, self.get_drones())
+            on_sheets = self._reads_sheet("drones")
+            if on_sheets:
+                self._save_sheet("drones", self._drone_cfg(), drones)
+            self._save_local("drones", self._drone_csv, drones, publish=not on_sheets)
 
     def update_missions(self, missions: list[dict[str, Any]]) -> None:
-        _write_csv(self._mission_csv, missions)
+        with self._exclusive():
+            missions = self._merge("missions", missions, self.get_missions())
+            self._save_local("missions", self._mission_csv, missions)
+
+    def _query_local(self, table: str, path: str, status: str | None, location: str | None) -> list[dict[str, Any]]:
+        if self._sqlite is not None:
+            self._cached_sqlite(table, path)
+            return self._sqlite.query(table, status, location)
+        self._cached_arrow(table, path)
+        return self._arrow.query(table, status, location)
+
+    def find_pilots(
+        self, skill: str | None, cert: str | None, location: str | None, available_only: bool = True
+    ) -> list[dict[str, Any]]:
+        # On SQLite (indexes) or Arrow (column kernels), status and location are
+        # answered by the backend and only the narrowed rows are checked for
+        # list-valued skills/certifications.
+        on_sheets = self._reads_sheet("pilots")
+        if self.backend not in ("sqlite", "arrow") or on_sheets or getattr(self._local, "batch", None):
+            return filter_pilots(self.get_pilots(), skill, cert, location, available_only)
+        if self._sheet_cfg("pilots") is not None:
+            self._load_synced("pilots")
+        rows = self._query_local(
+            "pilots", self._pilot_csv, "available" if available_only else None, location.lower() if location else None
+        )
+        return filter_pilots(rows, skill, cert, None, available_only=False)
+
+    def find_drones(
+        self, capability: str | None, location: str | None, available_only: bool = True
+    ) -> list[dict[str, Any]]:
+        on_sheets = self._reads_sheet("drones")
+        if self.backend not in ("sqlite", "arrow") or on_sheets or getattr(self._local, "batch", None):
+            return filter_drones(self.get_drones(), capability, location, available_only)
+        if self._sheet_cfg("drones") is not None:
+            self._load_synced("drones")
+        rows = self._query_local(
+            "drones", self._drone_csv, "available" if available_only else None, location.lower() if location else None
+        )
+        return filter_drones(rows, capability, None, available_only=False)
+
+    def _inserted(self, table: str, rows: RowSet, row: dict[str, Any]) -> RowSet:
+        # Insert-only: a key another writer already took is a conflict, never
+        # an overwrite.
+        field = TABLE_KEY_FIELDS[table]
+        if any(r.get(field) == row.get(field) for r in rows):
+            raise ConflictError(table, row.get(field))
+        rows.append(dict(row))
+        return rows
+
+    def insert_pilot(self, row: dict[str, Any]) -> None:
+        with self._exclusive():
+            self.update_pilots(self._inserted("pilots", self.get_pilots(), row))
+
+    def insert_drone(self, row: dict[str, Any]) -> None:
+        with self._exclusive():
+            self.update_drones(self._inserted("drones", self.get_drones(), row))
+
+    def insert_mission(self, row: dict[str, Any]) -> None:
+        with self._exclusive():
+            self.update_missions(self._inserted("missions", self.get_missions(), row))
+
+if __name__ == "__main__":
+    import sys
+
+    args = sys.argv[1:]
+    csv_paths = {"pilots": "pilot_roster.csv", "drones": "drone_fleet.csv", "missions": "missions.csv"}
+    if args[:1] == ["--arrow"]:
+        target = args[1] if len(args) > 1 else os.getenv("ARROW_DIR", "arrow")
+        counts = convert_csvs(target, csv_paths)
+    else:
+        target = args[0] if args else os.getenv("SQLITE_PATH", "drone_ops.db")
+        counts = import_csvs(target, csv_paths)
+    print(", ".join(f"{table}: {n} rows" for table, n in counts.items()) + f" imported into {target}")
@@ -1,14 +1,20 @@
 import streamlit as st
 
 from src.agent import DroneOpsAgent
-from src.logic import detect_conflicts, recommend_assignment
-from src.storage import DataStore
+from src.logic import recommend_assignment
 
 
 st.set_page_config(page_title="Drone Ops Coordinator", page_icon="DR", layout="wide")
 
-agent = DroneOpsAgent()
-store = DataStore()
+
+@st.cache_resource
+def _get_agent() -> DroneOpsAgent:
+    # Shared across reruns so the table cache and conflict engine persist.
+    return DroneOpsAgent()
+
+
+agent = _get_agent()
+store = agent.store
 
 st.markdown(
     """
@@ -87,6 +93,14 @@ def _format_data(data: dict) -> str:
         ids = ", ".join([d.get("drone_id") for d in data.get("drones", [])])
         if ids:
             lines.append(f"Drones: {ids}")
+    if data.get("assignments"):
+        lines.append("Assignments:")
+        for a in data.get("assignments", []):
+            lines.append(f"- {a['project']}: {a['pilot'].get('name')} / {a['drone'].get('drone_id')}")
+    if data.get("unassigned"):
+        lines.append("Not staffed:")
+        for proj, issues in data.get("unassigned", {}).items():
+            lines.append(f"- {proj}: {' '.join(issues)}")
     if data.get("conflicts"):
         lines.append("Conflicts:")
         for c in data.get("conflicts", []):
@@ -172,7 +186,7 @@ with col_center:
                         st.write(_format_data(data))
 
     with tabs[1]:
-        conflicts = detect_conflicts(pilots, drones, missions)
+        conflicts = agent.conflicts()
         if conflicts:
             for c in conflicts:
                 st.warning(c)
@@ -186,7 +200,17 @@ with col_center:
         st.dataframe(drones, use_container_width=True, height=220)
 
     with tabs[4]:
-        st.dataframe(missions, use_container_width=True, height=220)
+        eligibility = agent.eligibility()
+        if eligibility is not None:
+            pilot_counts = eligibility.pilots.sum(axis=0)
+            drone_counts = eligibility.drones.sum(axis=0)
+            coverage = [
+                {**m, "eligible_pilots": int(pilot_counts[i]), "eligible_drones": int(drone_counts[i])}
+                for i, m in enumerate(eligibility.index.missions)
+            ]
+            st.dataframe(coverage, use_container_width=True, height=220)
+        else:
+            st.dataframe(missions, use_container_width=True, height=220)
 
     with tabs[5]:
         form_tab_pilot, form_tab_drone, form_tab_mission = st.tabs(
@@ -263,8 +287,20 @@ with col_right:
     prompt = st.chat_input("Ask the coordinator")
     if prompt:
         st.session_state.messages.append({"role": "user", "content": prompt})
-        reply, data = agent.handle(prompt)
+        with st.chat_message("user"):
+            st.write(prompt)
+        final: dict = {}
+
+        def _tokens():
+            for event in agent.handle_stream(prompt):
+                if event["event"] == "token":
+                    yield event["text"]
+                else:
+                    final.update(event)
+
+        with st.chat_message("assistant"):
+            st.write_stream(_tokens())
         st.session_state.messages.append(
-            {"role": "assistant", "content": reply, "data": data}
+            {"role": "assistant", "content": final.get("reply", ""), "data": final.get("data")}
         )
         st.rerun()
@@ -0,0 +1,128 @@
+import re
+import threading
+import time
+from typing import Any
+
+
+# In-memory stand-in for the parts of gspread that GoogleSheetClient uses.
+# An instance replaces the module (storage.gspread), so each test gets its own
+# sheets, call log and injected failures.
+
+
+class APIError(Exception):
+    pass
+
+
+class FakeCredentials:
+    @staticmethod
+    def from_service_account_file(path: str, scopes: list[str] | None = None) -> object:
+        return object()
+
+
+class _Utils:
+    @staticmethod
+    def rowcol_to_a1(row: int, col: int) -> str:
+        letters = ""
+        while col:
+            col, rem = divmod(col - 1, 26)
+            letters = chr(65 + rem) + letters
+        return f"{letters}{row}"
+
+
+def _a1_to_rowcol(a1: str) -> tuple[int, int]:
+    m = re.match(r"([A-Z]+)(\d+)", a1)
+    col = 0
+    for ch in m.group(1):
+        col = col * 26 + ord(ch) - 64
+    return int(m.group(2)), col
+
+
+class FakeWorksheet:
+    def __init__(self, backend: "FakeGspread", key: tuple[str, str]) -> None:
+        self.backend = backend
+        self.key = key
+
+    def _call(self, name: str) -> None:
+        self.backend.calls.append((name, self.key))
+        if self.backend.delay:
+            time.sleep(self.backend.delay)
+        # Injected failures hit writes only.
+        if name != "get_all_records" and self.backend.failures:
+            raise self.backend.failures.pop(0)
+
+    def get_all_records(self) -> list[dict[str, Any]]:
+        self._call("get_all_records")
+        with self.backend.lock:
+            grid = self.backend.sheets.get(self.key, [])
+            if not grid:
+                return []
+            header = grid[0]
+            return [
+                {h: (row[i] if i < len(row) else "") for i, h in enumerate(header)}
+                for row in grid[1:]
+                if any(cell != "" for cell in row)
+            ]
+
+    def clear(self) -> None:
+        self._call("clear")
+        with self.backend.lock:
+            self.backend.sheets[self.key] = []
+
+    def update(self, values: list[list[Any]], range_name: str | None = None) -> None:
+        self._call("update")
+        with self.backend.lock:
+            self.backend.sheets[self.key] = [[str(v) for v in row] for row in values]
+
+    def batch_update(self, data: list[dict[str, Any]]) -> None:
+        self._call("batch_update")
+        with self.backend.lock:
+            grid = self.backend.sheets.setdefault(self.key, [])
+            for update in data:
+                row, col = _a1_to_rowcol(update["range"].split(":")[0])
+                for i, values in enumerate(update["values"]):
+                    while len(grid) < row + i:
+                        grid.append([])
+                    line = grid[row + i - 1]
+                    for j, value in enumerate(values):
+                        while len(line) < col + j:
+                            line.append("")
+                        line[col + j - 1] = str(value)
+
+
+class _Spreadsheet:
+    def __init__(self, backend: "FakeGspread", sheet_id: str) -> None:
+        self.backend = backend
+        self.sheet_id = sheet_id
+
+    def worksheet(self, tab: str) -> FakeWorksheet:
+        self.backend.calls.append(("worksheet", (self.sheet_id, tab)))
+        return FakeWorksheet(self.backend, (self.sheet_id, tab))
+
+
+class _Client:
+    def __init__(self, backend: "FakeGspread") -> None:
+        self.backend = backend
+
+    def open_by_key(self, sheet_id: str) -> _Spreadsheet:
+        self.backend.calls.append(("open_by_key", sheet_id))
+        return _Spreadsheet(self.backend, sheet_id)
+
+
+class FakeGspread:
+    APIError = APIError
+    utils = _Utils
+
+    def __init__(self) -> None:
+        # (sheet_id, tab) -> grid of cell strings, header row first.
+        self.sheets: dict[tuple[str, str], list[list[str]]] = {}
+        self.calls: list[tuple[str, Any]] = []
+        # Exceptions raised, in order, by the next write calls.
+        self.failures: list[Exception] = []
+        self.delay = 0.0
+        self.lock = threading.Lock()
+
+    def authorize(self, creds: object) -> _Client:
+        return _Client(self)
+
+    def writes(self) -> list[tuple[str, Any]]:
+        return [c for c in self.calls if c[0] in ("clear", "update", "batch_update")]
@@ -0,0 +1,67 @@
+import os
+import shutil
+import threading
+
+import pytest
+
+from src.storage import ConflictError, DataStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    for name in ("pilot_roster.csv", "drone_fleet.csv", "missions.csv"):
+        shutil.copy(os.path.join(ROOT, name), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("USE_LLM", "false")
+    return tmp_path
+
+
+def pilot(pilot_id, name):
+    return {
+        "pilot_id": pilot_id,
+        "name": name,
+        "skills": "Mapping",
+        "certifications": "DGCA",
+        "location": "Pune",
+        "status": "Available",
+        "current_assignment": "–",
+        "available_from": "",
+    }
+
+
+def test_insert_of_a_taken_key_conflicts_instead_of_overwriting(workdir):
+    first, second = DataStore(), DataStore()
+    first.get_pilots()
+    second.get_pilots()
+    first.insert_pilot(pilot("P900", "Ay"))
+    with pytest.raises(ConflictError):
+        second.insert_pilot(pilot("P900", "Bee"))
+    names = {p["pilot_id"]: p["name"] for p in DataStore().get_pilots()}
+    assert names["P900"] == "Ay"
+
+
+def test_interleaved_adds_get_distinct_ids(workdir):
+    from src.agent import DroneOpsAgent
+
+    agents = [DroneOpsAgent() for _ in range(6)]
+    for agent in agents:
+        # Every agent has read the same roster before any add lands.
+        agent.store.get_pilots()
+    barrier = threading.Barrier(len(agents))
+    replies = []
+
+    def add(i, agent):
+        barrier.wait()
+        replies.append(agent.handle(f"add pilot name=Pilot{i}, skills=Mapping, location=Pune")[1])
+
+    threads = [threading.Thread(target=add, args=(i, a)) for i, a in enumerate(agents)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ids = [reply["pilot"]["pilot_id"] for reply in replies]
+    assert len(set(ids)) == len(agents)
+    roster = {p["pilot_id"]: p["name"] for p in DataStore().get_pilots()}
+    assert {roster[i] for i in ids} == {f"Pilot{i}" for i in range(len(agents))}
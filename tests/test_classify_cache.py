@@ -0,0 +1,61 @@
+import json
+import time
+
+import pytest
+
+from src.llm import ClassificationCache
+
+
+@pytest.mark.parametrize(
+    "stored",
+    [{}, [[1, 2]], [None], "text", 42, [["k", "yesterday", {}]], [[["k"], 1.0, {}]]],
+)
+def test_wrong_shaped_file_starts_empty(tmp_path, stored):
+    path = tmp_path / "cache.json"
+    path.write_text(json.dumps(stored), encoding="utf-8")
+    cache = ClassificationCache(path=str(path))
+    assert cache.stats()["size"] == 0
+
+
+def test_bad_entries_are_skipped_and_good_ones_kept(tmp_path):
+    path = tmp_path / "cache.json"
+    good = ["llama3.1\nfind pilots", 1e12, {"intent": "pilots_available"}]
+    path.write_text(json.dumps([[1, 2], good, "x"]), encoding="utf-8")
+    cache = ClassificationCache(ttl=float("inf"), path=str(path))
+    assert cache.get(good[0]) == {"intent": "pilots_available"}
+
+
+def test_puts_are_written_once_per_delay(tmp_path, monkeypatch):
+    path = tmp_path / "cache.json"
+    cache = ClassificationCache(path=str(path), save_delay=60)
+    saves = []
+    save = cache._save
+    monkeypatch.setattr(cache, "_save", lambda stored: saves.append(len(stored)) or save(stored))
+    for i in range(5):
+        cache.put(f"k{i}", {"intent": "conflicts"})
+    assert not path.exists()
+    cache.flush()
+    cache.flush()
+    assert saves == [5]
+    assert [entry[0] for entry in json.loads(path.read_text(encoding="utf-8"))] == [f"k{i}" for i in range(5)]
+    assert [p.name for p in tmp_path.iterdir()] == ["cache.json"]
+
+
+def test_timer_writes_pending_puts(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = ClassificationCache(path=str(path), save_delay=0.05)
+    cache.put("k", {"intent": "conflicts"})
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert ClassificationCache(path=str(path)).get("k") == {"intent": "conflicts"}
+
+
+def test_save_keeps_the_file_mode(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text("[]", encoding="utf-8")
+    path.chmod(0o644)
+    cache = ClassificationCache(path=str(path))
+    cache.put("k", {"intent": "conflicts"})
+    cache.flush()
+    assert path.stat().st_mode & 0o777 == 0o644
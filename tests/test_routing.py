@@ -0,0 +1,90 @@
+import os
+import shutil
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    for name in ("pilot_roster.csv", "drone_fleet.csv", "missions.csv"):
+        shutil.copy(os.path.join(ROOT, name), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("USE_LLM", "true")
+    from src.agent import DroneOpsAgent
+
+    agent = DroneOpsAgent()
+    agent.classified = []
+    agent.routes = {}
+
+    def classify(message):
+        agent.classified.append(message)
+        return agent.routes.get(message)
+
+    monkeypatch.setattr(agent.ollama, "classify", classify)
+    monkeypatch.setattr(agent.ollama, "answer", lambda message, context: None)
+    return agent
+
+
+def test_conflict_question_mentioning_assign_goes_to_the_router(agent):
+    message = "is there a conflict if we assign Arjun?"
+    agent.routes[message] = {"intent": "conflicts"}
+    reply, data, route = agent.handle_with_route(message)
+    assert agent.classified == [message]
+    assert route == "llm_classify"
+    assert "conflicts" in data
+
+
+def test_available_pilots_with_make_goes_to_the_router(agent):
+    message = "show available pilots and make it quick"
+    agent.routes[message] = {"intent": "pilots_available"}
+    reply, data, route = agent.handle_with_route(message)
+    assert agent.classified == [message]
+    assert route == "llm_classify"
+    assert reply.startswith("Available pilots:")
+
+
+@pytest.mark.parametrize(
+    "message",
+    ["detect conflicts", "find available pilots", "resources for PRJ001", "update pilot P002 status On Leave"],
+)
+def test_single_trigger_messages_skip_the_router(agent, message):
+    _, _, route = agent.handle_with_route(message)
+    assert route == "rules"
+    assert agent.classified == []
+
+
+def test_pilot_name_is_looked_up_in_the_callers_rows(agent):
+    pilots = agent.store.get_pilots()
+    agent.eligibility()
+    # Rows from another snapshot: reordered and one pilot short.
+    other = [dict(p) for p in reversed(pilots[1:])]
+    found = agent._extract_pilot_by_name("is Arjun assigned", other)
+    assert found is None
+    found = agent._extract_pilot_by_name(f"is {pilots[1]['name']} assigned", other)
+    assert found is other[-1]
+
+
+def test_answer_context_index_is_built_once_per_snapshot(agent, monkeypatch):
+    from src import agent as agent_module
+
+    built = []
+    real = agent_module.ContextIndex
+
+    def counting(*tables):
+        built.append(tables)
+        return real(*tables)
+
+    monkeypatch.setattr(agent_module, "ContextIndex", counting)
+    contexts = []
+    monkeypatch.setattr(agent.ollama, "answer", lambda message, context: contexts.append(context) or "ok")
+    agent.handle("what is Arjun flying in Bangalore")
+    agent.handle("tell me about Neha")
+    assert len(built) == 1
+    assert contexts[0]["pilots"][0]["name"] == "Arjun"
+    assert contexts[1]["pilots"][0]["name"] == "Neha"
+    agent.handle("update pilot P002 status On Leave")
+    agent.handle("tell me about Neha")
+    assert len(built) == 2
+    assert contexts[2]["pilots"][0]["status"] == "On Leave"
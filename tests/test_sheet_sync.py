@@ -0,0 +1,101 @@
+import time
+
+import pytest
+
+from fake_gspread import FakeCredentials, FakeGspread
+from src import storage
+from src.storage import GoogleSheetClient, SheetConfig, SheetSyncWorker
+
+CFG = SheetConfig("sheet-1", "Pilots")
+HEADER = ["pilot_id", "name", "status"]
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    gs = FakeGspread()
+    gs.sheets[(CFG.sheet_id, CFG.tab_name)] = [HEADER, ["P001", "Arjun", "Available"], ["P002", "Neha", "Available"]]
+    monkeypatch.setattr(storage, "gspread", gs)
+    monkeypatch.setattr(storage, "Credentials", FakeCredentials)
+    return gs
+
+
+@pytest.fixture
+def rows():
+    return [
+        {"pilot_id": "P001", "name": "Arjun", "status": "Available"},
+        {"pilot_id": "P002", "name": "Neha", "status": "Available"},
+    ]
+
+
+def make_worker(fake, rows, delay=0.05, max_backoff=1.0):
+    client = GoogleSheetClient("service-account.json", ttl=30)
+    client.read(CFG)
+    fake.calls.clear()
+    worker = SheetSyncWorker(client, lambda table: [dict(r) for r in rows], delay=delay, max_backoff=max_backoff)
+    return worker
+
+
+def sheet(fake):
+    return fake.sheets[(CFG.sheet_id, CFG.tab_name)]
+
+
+def test_marks_within_delay_coalesce_into_one_write(fake, rows):
+    worker = make_worker(fake, rows, delay=0.2)
+    for i in range(5):
+        rows[0]["status"] = f"S{i}"
+        worker.mark("pilots", CFG)
+    assert worker.flush(timeout=5)
+    stats = worker.stats()
+    assert stats["coalesced"] == 4
+    assert stats["pushed"] == 1
+    assert fake.writes() == [("batch_update", (CFG.sheet_id, CFG.tab_name))]
+    assert sheet(fake)[1] == ["P001", "Arjun", "S4"]
+    worker.stop()
+
+
+def test_queue_depth_and_lag_track_pending_tabs(fake, rows):
+    worker = make_worker(fake, rows, delay=0.3)
+    assert worker.stats()["queue_depth"] == 0
+    rows[1]["status"] = "On Leave"
+    worker.mark("pilots", CFG)
+    time.sleep(0.1)
+    stats = worker.stats()
+    assert stats["queue_depth"] == 1
+    assert stats["lag_s"] >= 0.1
+    assert worker.flush(timeout=5)
+    stats = worker.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["lag_s"] == 0.0
+    worker.stop()
+
+
+def test_failed_write_is_retried_with_backoff(fake, rows):
+    fake.failures.extend([fake.APIError("quota exceeded"), fake.APIError("quota exceeded")])
+    worker = make_worker(fake, rows, delay=0.05, max_backoff=0.15)
+    rows[0]["status"] = "Retry"
+    started = time.monotonic()
+    worker.mark("pilots", CFG)
+    time.sleep(0.1)
+    assert worker.stats()["queue_depth"] == 1
+    assert worker.flush(timeout=5)
+    elapsed = time.monotonic() - started
+    stats = worker.stats()
+    assert stats["failures"] == 2
+    assert stats["last_error"] == "pilots: quota exceeded"
+    assert stats["pushed"] == 1
+    assert stats["queue_depth"] == 0
+    # delay, then 2x delay, then 4x delay capped at max_backoff.
+    assert elapsed >= 0.05 + 0.1 + 0.15
+    assert sheet(fake)[1] == ["P001", "Arjun", "Retry"]
+    worker.stop()
+
+
+def test_flush_times_out_while_a_push_is_pending(fake, rows):
+    fake.delay = 0.5
+    worker = make_worker(fake, rows, delay=0.01)
+    rows[0]["status"] = "Slow"
+    worker.mark("pilots", CFG)
+    assert worker.flush(timeout=0.1) is False
+    assert worker.stats()["queue_depth"] == 1
+    assert worker.flush(timeout=5)
+    worker.stop()